@@ -3,23 +3,41 @@
 Ollama Web Host - Host your local Ollama installation with a simple web interface
 """
 
+import os
 import socket
 import requests
 import json
-from flask import Flask, render_template_string, request, jsonify, Response
+from flask import Flask, request, jsonify, Response
 import webbrowser
 from threading import Timer
 
+from model_catalog import ModelCatalog
+from model_residency import ModelResidency
+from ollama_client import GENERATION_OPTIONS, OllamaClient
+from page_cache import PageRenderer
+from profiling import ADMIN_TOKEN, AdminTools, flask_blueprint
+from response_cache import response_cache
+import session_state
+
 app = Flask(__name__)
+session_state.init_sessions(app)
 
 # Configuration
-OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+ollama = OllamaClient(OLLAMA_BASE_URL)  # Shared keep-alive connection pool
 DEFAULT_CODER_MODEL = "deepseek-coder"
 DEFAULT_CONVERSATION_MODEL = "llama3.2"
 
-# Store current model and mode
-current_model = DEFAULT_CONVERSATION_MODEL
+# Installed models and mode -> model mapping, refreshed in the background
+catalog = ModelCatalog(ollama, {
+    "coder": DEFAULT_CODER_MODEL,
+    "conversation": DEFAULT_CONVERSATION_MODEL
+})
+
+# Server default; each browser session keeps its own mode, the catalog picks its model
 current_mode = "conversation"
+usage = session_state.ModelUsage()
+residency = ModelResidency(ollama)  # Keeps the mode models loaded between requests
 
 # HTML Template
 HTML_TEMPLATE = """
@@ -480,6 +498,18 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# Compiled once; rendered pages are cached per session mode/model
+pages = PageRenderer(app, HTML_TEMPLATE)
+
+def memory_report():
+    """Objects held by the app's caches, for /admin/memory"""
+    return {"caches": {"response_cache": response_cache, "pages": pages, "usage": usage,
+                       "residency": residency, "catalog": catalog}}
+
+# Profiling endpoints, only when an admin token is configured
+if ADMIN_TOKEN:
+    app.register_blueprint(flask_blueprint(AdminTools(memory_report)))
+
 def get_local_ip():
     """Get the local IP address of the machine"""
     try:
@@ -494,7 +524,7 @@ def get_local_ip():
 def check_ollama_connection():
     """Check if Ollama is running"""
     try:
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=2)
+        response = ollama.get("/api/tags", timeout=2)
         return response.status_code == 200
     except:
         return False
@@ -502,7 +532,7 @@ def check_ollama_connection():
 def get_available_models():
     """Get list of available models from Ollama"""
     try:
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=2)
+        response = ollama.get("/api/tags", timeout=2)
         if response.status_code == 200:
             data = response.json()
             return [model['name'] for model in data.get('models', [])]
@@ -513,9 +543,8 @@ def get_available_models():
 @app.route('/')
 def home():
     """Render the main chat interface"""
-    return render_template_string(HTML_TEMPLATE, 
-                                 current_model=current_model,
-                                 current_mode=current_mode)
+    mode = session_state.get_mode(current_mode)
+    return pages.response(current_model=catalog.model_for_mode(mode), current_mode=mode)
 
 @app.route('/test')
 def test():
@@ -525,42 +554,46 @@ def test():
 
 @app.route('/set_mode', methods=['POST'])
 def set_mode():
-    """Switch between coder and conversation modes"""
-    global current_model, current_mode
-    
+    """Switch between coder and conversation modes for this session"""
     data = request.get_json()
-    mode = data.get('mode', 'conversation')
+    mode = 'coder' if data.get('mode') == 'coder' else 'conversation'
     
-    # Get available models
-    available_models = get_available_models()
-    
-    if mode == 'coder':
-        # Try to find a coder model
-        for model_name in available_models:
-            if 'coder' in model_name.lower() or 'code' in model_name.lower():
-                current_model = model_name
-                break
-        else:
-            # Default to first available model if no coder model found
-            current_model = available_models[0] if available_models else DEFAULT_CODER_MODEL
-        current_mode = 'coder'
-    else:
-        # Try to find a conversation model
-        for model_name in available_models:
-            if 'llama' in model_name.lower() or 'mistral' in model_name.lower():
-                current_model = model_name
-                break
-        else:
-            # Default to first available model
-            current_model = available_models[0] if available_models else DEFAULT_CONVERSATION_MODEL
-        current_mode = 'conversation'
+    # Mode -> model mapping is precomputed by the catalog, so this never waits on Ollama
+    model = catalog.model_for_mode(mode)
+    session_state.set_mode(mode)
+    residency.warm(model)
     
     return jsonify({
         'success': True,
-        'mode': current_mode,
-        'model': current_model
+        'mode': mode,
+        'model': model
     })
 
+@app.route('/models')
+def models():
+    """List cached models, metadata and the mode -> model mapping"""
+    return jsonify(catalog.snapshot())
+
+@app.route('/model-usage')
+def model_usage():
+    """Report per-model request counters"""
+    return jsonify(usage.snapshot())
+
+@app.route('/model-residency')
+def model_residency():
+    """Report which models are loaded and how often requests hit a cold model"""
+    return jsonify(residency.snapshot())
+
+@app.route('/response-cache')
+def response_cache_stats():
+    """Report response cache hits and size"""
+    return jsonify(response_cache.snapshot())
+
+@app.route('/ollama-metrics')
+def ollama_metrics():
+    """Report Ollama call latency, errors and retries"""
+    return jsonify(ollama.metrics())
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """Handle chat messages and communicate with Ollama"""
@@ -570,28 +603,43 @@ def chat():
     if not user_message:
         return jsonify({'error': 'No message provided'}), 400
     
+    mode = session_state.get_mode(current_mode)
+    model = catalog.model_for_mode(mode)
+    
     # Prepare system prompt based on mode
     system_prompt = ""
-    if current_mode == 'coder':
+    if mode == 'coder':
         system_prompt = "You are an expert programmer. Provide clear, concise code examples with explanations. Format code using markdown code blocks."
     else:
         system_prompt = "You are a helpful, friendly assistant. Provide clear and concise responses."
     
+    # Deterministic prompts may already have an answer
+    cache_key = response_cache.key_for(model, system_prompt, [{"role": "user", "content": user_message}],
+                                       GENERATION_OPTIONS)
+    cached = response_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        return jsonify({'response': cached, 'cached': True})
+    
     try:
         # Send request to Ollama
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json={
-                "model": current_model,
-                "prompt": user_message,
-                "system": system_prompt,
-                "stream": False
-            },
-            timeout=120
-        )
+        residency.touch(model)
+        with usage.track(model):
+            response = ollama.post(
+                "/api/generate",
+                json={
+                    "model": model,
+                    "prompt": user_message,
+                    "system": system_prompt,
+                    "options": GENERATION_OPTIONS,
+                    "stream": False
+                }
+            )
         
         if response.status_code == 200:
             result = response.json()
+            residency.record_load(model, result.get('load_duration', 0))
+            if cache_key and result.get('response'):
+                response_cache.put(cache_key, result['response'])
             return jsonify({'response': result.get('response', 'No response from model')})
         else:
             return jsonify({'error': f'Ollama error: {response.status_code}'}), 500
@@ -616,16 +664,19 @@ if __name__ == '__main__':
     # Check Ollama connection
     if check_ollama_connection():
         print("✅ Connected to Ollama")
+        catalog.refresh()
+        catalog.start()
         
         # Get available models
         models = get_available_models()
         if models:
             print(f"📦 Available models: {', '.join(models)}")
-            # Set default model to first available
-            current_model = models[0]
         else:
             print("⚠️  No models found. Please pull a model first:")
             print("   ollama pull llama3.2")
+        
+        # Load the mode models before the first chat needs them
+        residency.start([catalog.model_for_mode(m) for m in catalog.defaults])
     else:
         print("❌ Cannot connect to Ollama!")
         print("   Make sure Ollama is running:")
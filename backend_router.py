@@ -0,0 +1,114 @@
+"""
+Gummy Backend Router - Thread-to-backend affinity across Ollama servers
+Consistent hashing keeps a conversation on the server that holds its cached prompt prefix
+"""
+
+import bisect
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional
+
+MAX_TRACKED_THREADS = 10000
+CHARS_PER_TOKEN = 4  # Rough estimate used when Ollama can't tell us the full prompt size
+
+def _hash(key: str) -> int:
+    """Stable 64-bit hash for ring placement"""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+def estimate_tokens(messages: List[dict]) -> int:
+    """Estimate prompt tokens for a list of chat messages"""
+    return sum(len(m.get("content", "")) for m in messages) // CHARS_PER_TOKEN
+
+class HashRing:
+    """Consistent hash ring with virtual nodes"""
+
+    def __init__(self, nodes: List[str], replicas: int = 64):
+        self.nodes = list(nodes)
+        self._ring = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._keys = [h for h, _ in self._ring]
+
+    def walk(self, key: str) -> Iterator[str]:
+        """Yield distinct nodes in ring order starting at the key's position"""
+        if not self._ring:
+            return
+        seen = set()
+        start = bisect.bisect(self._keys, _hash(key))
+        for i in range(len(self._ring)):
+            node = self._ring[(start + i) % len(self._ring)][1]
+            if node not in seen:
+                seen.add(node)
+                yield node
+                if len(seen) == len(self.nodes):
+                    return
+
+@dataclass
+class ThreadStats:
+    backend: str = ""
+    turns: int = 0
+    affinity_hits: int = 0  # Turns served by the same backend as the previous turn
+    prompt_tokens_estimated: int = 0
+    prompt_eval_count: int = 0
+    saved_tokens: int = 0  # Estimated prompt tokens Ollama didn't have to evaluate
+
+class BackendRouter:
+    """Route threads to backends with affinity, spilling over when a backend is busy"""
+
+    def __init__(self, backends: List[str], max_inflight: int = 2):
+        self.ring = HashRing(backends)
+        self.max_inflight = max_inflight
+        self.in_flight: Dict[str, int] = {b: 0 for b in backends}
+        self.fallbacks = 0
+        self.threads: "OrderedDict[str, ThreadStats]" = OrderedDict()
+
+    def preferred(self, thread_id: str) -> str:
+        """Backend acquire() would pick right now, without reserving it"""
+        candidates = list(self.ring.walk(thread_id))
+        return next((c for c in candidates if self.in_flight[c] < self.max_inflight), candidates[0])
+
+    def acquire(self, thread_id: str) -> str:
+        """Pick a backend for a thread and mark a request in flight"""
+        backend = self.preferred(thread_id)
+        if backend != next(self.ring.walk(thread_id)):
+            self.fallbacks += 1
+
+        self.in_flight[backend] += 1
+        return backend
+
+    def release(self, backend: str):
+        """Mark a request on a backend as finished"""
+        self.in_flight[backend] = max(0, self.in_flight[backend] - 1)
+
+    def record(self, thread_id: str, backend: str, messages: List[dict], stats: dict):
+        """Record prompt evaluation for a turn from Ollama's final stream chunk"""
+        thread = self.threads.pop(thread_id, None) or ThreadStats()
+        self.threads[thread_id] = thread
+        if len(self.threads) > MAX_TRACKED_THREADS:
+            self.threads.popitem(last=False)
+
+        estimated = estimate_tokens(messages)
+        # Ollama omits prompt_eval_count when the whole prompt came from its cache
+        evaluated = stats.get("prompt_eval_count", 0)
+        if thread.backend == backend:
+            thread.affinity_hits += 1
+        thread.backend = backend
+        thread.turns += 1
+        thread.prompt_tokens_estimated += estimated
+        thread.prompt_eval_count += evaluated
+        thread.saved_tokens += max(0, estimated - evaluated)
+
+    def thread_stats(self, thread_id: str) -> Optional[dict]:
+        """Per-thread affinity and prompt evaluation metrics"""
+        thread = self.threads.get(thread_id)
+        return asdict(thread) if thread else None
+
+    def snapshot(self) -> dict:
+        """Backend load and aggregate prompt evaluation savings"""
+        return {
+            "backends": [{"url": b, "in_flight": n} for b, n in self.in_flight.items()],
+            "max_inflight": self.max_inflight,
+            "fallbacks": self.fallbacks,
+            "tracked_threads": len(self.threads),
+            "prompt_eval_count": sum(t.prompt_eval_count for t in self.threads.values()),
+            "saved_tokens": sum(t.saved_tokens for t in self.threads.values())
+        }
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Gummy Flask Chat Benchmark - Blocking /chat vs streaming /chat/stream under load
+Starts app.py, simple_app.py and premium_app.py against the fake Ollama and sweeps client
+concurrency, reporting latency, time to first token, throughput and server threads.
+Run: python3 bench/bench_flask.py --concurrency 1 4 16 64 --output bench/results/flask.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from common import compare, percentiles, rss_mb, save, thread_count, wait_for
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, "bench")
+
+# name -> (module, path, streams)
+TARGETS: Dict[str, Tuple[str, str, bool]] = {
+    "app.chat": ("app", "/chat", False),
+    "simple_app.chat": ("simple_app", "/chat", False),
+    "premium_app.chat": ("premium_app", "/chat", False),
+    "premium_app.stream": ("premium_app", "/chat/stream", True)
+}
+DEFAULT_CONCURRENCY = (1, 4, 16, 64)
+SAMPLE_INTERVAL = 0.1  # Seconds between thread/memory samples
+
+class Sampler:
+    """Peak server threads, server memory and in-flight Ollama requests during one level"""
+
+    def __init__(self, session: aiohttp.ClientSession, pid: Optional[int], ollama_url: str):
+        self.session = session
+        self.pid = pid
+        self.ollama_url = ollama_url
+        self.threads: List[int] = []
+        self.rss: List[float] = []
+        self.upstream: List[int] = []
+
+    async def run(self, stop: asyncio.Event):
+        while not stop.is_set():
+            threads, rss = thread_count(self.pid), rss_mb(self.pid)
+            if threads is not None:
+                self.threads.append(threads)
+            if rss is not None:
+                self.rss.append(rss)
+            try:
+                async with self.session.get(f"{self.ollama_url}/fake/stats") as resp:
+                    self.upstream.append((await resp.json())["active"])
+            except (aiohttp.ClientError, KeyError, ValueError):
+                pass
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+async def chat_once(session: aiohttp.ClientSession, url: str, streams: bool, message: str,
+                    timeout: float) -> Tuple[bool, float, Optional[float]]:
+    """One chat request; returns (ok, latency, time to first token)"""
+    start = time.perf_counter()
+    first = None
+    try:
+        async with session.post(url, json={"message": message},
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+            if resp.status != 200:
+                await resp.read()
+                return False, time.perf_counter() - start, None
+            if not streams:
+                ok = "response" in await resp.json()
+                elapsed = time.perf_counter() - start
+                return ok, elapsed, elapsed
+
+            ok = False
+            async for line in resp.content:
+                if not line.startswith(b"data:"):
+                    continue
+                event = json.loads(line[5:])
+                if "delta" in event and first is None:
+                    first = time.perf_counter() - start
+                if "error" in event:
+                    break
+                if event.get("done"):
+                    ok = True
+                    break
+            return ok, time.perf_counter() - start, first
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return False, time.perf_counter() - start, None
+
+async def run_level(url: str, streams: bool, concurrency: int, pid: Optional[int], args: argparse.Namespace) -> dict:
+    """Closed loop: `concurrency` clients each send --requests chats back to back"""
+    latency: List[float] = []
+    ttft: List[float] = []
+    errors = 0
+
+    async def client(index: int):
+        nonlocal errors
+        for n in range(args.requests):
+            ok, elapsed, first = await chat_once(session, url, streams, f"bench {concurrency}.{index}.{n}", args.timeout)
+            if not ok:
+                errors += 1
+                continue
+            latency.append(elapsed)
+            if first is not None:
+                ttft.append(first)
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+        sampler = Sampler(session, pid, args.ollama_url)
+        stop = asyncio.Event()
+        sampling = asyncio.create_task(sampler.run(stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await sampling
+
+    total = concurrency * args.requests
+    ideal = args.ttft + args.tokens / args.tokens_per_second
+    return {
+        "requests_ok": len(latency),
+        "error_rate": round(errors / total, 4),
+        "latency_ms": percentiles(latency, 1000),
+        "ttft_ms": percentiles(ttft, 1000),
+        "throughput": {"requests_per_second": round(len(latency) / elapsed, 3)},
+        # 1.0 means every client got answers as fast as the model alone allows
+        "scaling_efficiency": round(len(latency) / elapsed / (concurrency / ideal), 3),
+        "server_threads_peak": max(sampler.threads, default=0),
+        "server_rss_mb_peak": max(sampler.rss, default=0),
+        "ollama_in_flight_peak": max(sampler.upstream, default=0)
+    }
+
+def max_concurrency(levels: Dict[str, dict], ideal: float, slo: float) -> int:
+    """Highest level with no errors and p99 latency within slo x the model's own time"""
+    best = 0
+    for level, result in levels.items():
+        p99 = result["latency_ms"].get("p99")
+        if result["error_rate"] == 0 and p99 is not None and p99 / 1000 <= slo * ideal:
+            best = max(best, int(level))
+    return best
+
+def spawn_fake(args: argparse.Namespace) -> subprocess.Popen:
+    fake = subprocess.Popen([
+        sys.executable, os.path.join(BENCH_DIR, "fake_ollama.py"), "--port", str(args.fake_port),
+        "--tokens-per-second", str(args.tokens_per_second), "--ttft", str(args.ttft), "--tokens", str(args.tokens)
+    ], stdout=subprocess.DEVNULL)
+    wait_for(f"{args.ollama_url}/api/version")
+    return fake
+
+def spawn_app(module: str, port: int, args: argparse.Namespace) -> subprocess.Popen:
+    """Run an app through the Flask CLI (threaded dev server) without its browser/tunnel startup"""
+    env = dict(os.environ, OLLAMA_BASE_URL=args.ollama_url, RESPONSE_CACHE="0")
+    server = subprocess.Popen([sys.executable, "-m", "flask", "--app", module, "run", "--port", str(port)],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for(f"http://127.0.0.1:{port}/")
+    return server
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Flask chat apps, blocking vs streaming")
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(DEFAULT_CONCURRENCY),
+                        help="Concurrent clients per level")
+    parser.add_argument("--requests", type=int, default=3, help="Chats each client sends per level")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before a request counts as failed")
+    parser.add_argument("--slo", type=float, default=2.0,
+                        help="p99 budget, as a multiple of the model's own response time, for max_concurrency")
+    parser.add_argument("--port", type=int, default=5103, help="First port for the spawned apps")
+    parser.add_argument("--output", help="Save results to this JSON file")
+    parser.add_argument("--compare", help="Compare with a saved results file")
+
+    model = parser.add_argument_group("model latency (fake Ollama)")
+    model.add_argument("--ollama-url", help="Use an already running (fake) Ollama instead of spawning one")
+    model.add_argument("--fake-port", type=int, default=11500)
+    model.add_argument("--tokens-per-second", type=float, default=30.0)
+    model.add_argument("--ttft", type=float, default=0.2)
+    model.add_argument("--tokens", type=int, default=32)
+    args = parser.parse_args(argv)
+    args.spawn_fake = args.ollama_url is None
+    args.ollama_url = args.ollama_url or f"http://127.0.0.1:{args.fake_port}"
+    return args
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    ideal = args.ttft + args.tokens / args.tokens_per_second
+    children = [spawn_fake(args)] if args.spawn_fake else []
+    servers: Dict[str, Tuple[subprocess.Popen, int]] = {}
+    results = {}
+
+    try:
+        for module in dict.fromkeys(TARGETS[t][0] for t in args.targets):
+            port = args.port + len(servers)
+            servers[module] = (spawn_app(module, port, args), port)
+            children.append(servers[module][0])
+
+        print(f"Model alone: {ideal * 1000:.0f} ms per reply "
+              f"({args.ttft}s to first token, {args.tokens} tokens at {args.tokens_per_second}/s)")
+        print(f"{'target':<20}{'clients':>8}{'ok':>6}{'err %':>7}{'p50 ms':>9}{'p99 ms':>9}"
+              f"{'ttft p50':>10}{'req/s':>8}{'threads':>9}{'upstream':>10}")
+        for name in args.targets:
+            module, path, streams = TARGETS[name]
+            server, port = servers[module]
+            levels = {}
+            for concurrency in args.concurrency:
+                result = asyncio.run(run_level(f"http://127.0.0.1:{port}{path}", streams, concurrency, server.pid, args))
+                levels[str(concurrency)] = result
+                print(f"{name:<20}{concurrency:>8}{result['requests_ok']:>6}{100 * result['error_rate']:>7.1f}"
+                      f"{result['latency_ms'].get('p50', 0):>9.0f}{result['latency_ms'].get('p99', 0):>9.0f}"
+                      f"{result['ttft_ms'].get('p50', 0):>10.0f}{result['throughput']['requests_per_second']:>8.2f}"
+                      f"{result['server_threads_peak']:>9}{result['ollama_in_flight_peak']:>10}")
+            results[name] = {"levels": levels, "max_concurrency": max_concurrency(levels, ideal, args.slo)}
+            print(f"{name:<20}max concurrency within {args.slo}x model time: {results[name]['max_concurrency']}")
+    finally:
+        for child in reversed(children):
+            child.terminate()
+            child.wait()
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "spawn_fake")}
+    if args.output:
+        save(args.output, "bench_flask", config, results)
+    if args.compare:
+        return 0 if compare(results, args.compare) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Gummy Scheduler Benchmark - RoomState queueing under realistic arrival patterns
+Replays simulated rooms (10 to 10,000 users) through enqueue_job, get_next_job,
+remove_user and estimate_eta on a virtual clock. It reports per-operation latency plus
+fairness: Jain's index against a max-min fair share, and the wait each user saw.
+Run: python3 bench/bench_scheduler.py --sizes 10 100 1000 --output bench/results/scheduler.json
+"""
+
+import argparse
+import heapq
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("HISTORY_DIR", tempfile.mkdtemp(prefix="gummy-bench-"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from collaborative_app import Job, RoomState, UserInfo  # noqa: E402
+from common import compare, percentiles, save  # noqa: E402
+
+SERVICE_TIME = 1.0  # Virtual seconds per generation
+FAIRNESS_WINDOW = 50  # Minimum dispatches per fairness sample; windows also span a full round
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+# Event kinds, in the order they apply at the same instant
+JOIN, JOB, LEAVE = 0, 1, 2
+Event = Tuple[float, int, str]  # (time, kind, user_id)
+
+def steady(users: int, rng: random.Random) -> List[Event]:
+    """Everyone chats at a steady rate; the room runs at about 90% load"""
+    jobs = 2 * users
+    span = jobs * SERVICE_TIME / 0.9
+    events = [(0.0, JOIN, f"u{i}") for i in range(users)]
+    events += [(rng.uniform(0, span), JOB, f"u{i}") for i in range(users) for _ in range(2)]
+    return events
+
+def classroom(users: int, rng: random.Random) -> List[Event]:
+    """Two bursts: everyone submits within a few seconds of being told to"""
+    events = [(0.0, JOIN, f"u{i}") for i in range(users)]
+    for burst_at in (0.0, users * SERVICE_TIME / 2):
+        events += [(burst_at + rng.uniform(0, 5), JOB, f"u{i}") for i in range(users)]
+    return events
+
+def heavy_user(users: int, rng: random.Random) -> List[Event]:
+    """One user dumps a backlog as big as the room while everyone else asks once"""
+    events = [(0.0, JOIN, f"u{i}") for i in range(users)]
+    events += [(rng.uniform(0, 1), JOB, "u0") for _ in range(users)]
+    events += [(rng.uniform(0, users * SERVICE_TIME), JOB, f"u{i}") for i in range(1, users)]
+    return events
+
+def churn(users: int, rng: random.Random) -> List[Event]:
+    """Users come and go, often leaving with jobs still queued"""
+    span = 2 * users * SERVICE_TIME
+    events = []
+    for i in range(users):
+        joined = rng.uniform(0, span)
+        left = joined + rng.expovariate(1 / (users * SERVICE_TIME / 4))
+        events.append((joined, JOIN, f"u{i}"))
+        events += [(rng.uniform(joined, left), JOB, f"u{i}") for _ in range(rng.randint(1, 3))]
+        events.append((left, LEAVE, f"u{i}"))
+    return events
+
+SCENARIOS: Dict[str, Callable[[int, random.Random], List[Event]]] = {
+    "steady": steady,
+    "classroom": classroom,
+    "heavy_user": heavy_user,
+    "churn": churn
+}
+
+def water_fill(demands: Dict[str, int], capacity: float) -> Dict[str, float]:
+    """Max-min fair share of capacity given each user's demand"""
+    alloc, remaining = {}, dict(demands)
+    while remaining and capacity > 1e-9:
+        share = capacity / len(remaining)
+        satisfied = {u: d for u, d in remaining.items() if d <= share}
+        if not satisfied:
+            alloc.update({u: share for u in remaining})
+            return alloc
+        for user_id, demand in satisfied.items():
+            alloc[user_id] = demand
+            capacity -= demand
+            del remaining[user_id]
+    return alloc
+
+def jain(values: List[float]) -> float:
+    """Jain's fairness index: 1.0 when all values are equal, 1/n when one user gets everything"""
+    if not values or not any(values):
+        return 1.0
+    return sum(values) ** 2 / (len(values) * sum(v * v for v in values))
+
+class Timer:
+    """Per-operation latency samples"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def call(self, name: str, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.samples[name].append(time.perf_counter() - start)
+        return result
+
+def simulate(events: List[Event], budget: float) -> dict:
+    """Replay events through one RoomState on a virtual clock"""
+    room = RoomState(f"bench-{uuid.uuid4().hex[:8]}")
+    timer = Timer()
+    heapq.heapify(events)
+
+    arrivals: Dict[str, float] = {}
+    waits: Dict[str, List[float]] = defaultdict(list)
+    served_window, demand_window = Counter(), Counter()
+    fairness: List[float] = []
+    dispatched = cancelled = window_start = 0
+    clock = 0.0
+    wall_start = time.perf_counter()
+    truncated = False
+
+    while events or room.pending_jobs:
+        if time.perf_counter() - wall_start > budget:
+            truncated = True
+            break
+
+        # Apply everything that has happened by now
+        while events and events[0][0] <= clock:
+            at, kind, user_id = heapq.heappop(events)
+            if kind == JOIN:
+                timer.call("add_user", room.add_user, UserInfo(user_id, user_id, None, at, f"t-{user_id}"))
+            elif kind == LEAVE:
+                before = len(room.pending_jobs)
+                timer.call("remove_user", room.remove_user, user_id)
+                cancelled += before - len(room.pending_jobs)
+            elif user_id in room.users:
+                job = Job(uuid.uuid4().hex, room.room_id, f"t-{user_id}", user_id, [], at)
+                arrivals[job.job_id] = at
+                position = timer.call("enqueue_job", room.enqueue_job, job)
+                timer.call("estimate_eta", room.estimate_eta, position)
+                demand_window[user_id] += 1
+
+        job = timer.call("get_next_job", room.get_next_job)
+        if job is None:
+            if not events:
+                break
+            clock = max(clock, events[0][0])
+            continue
+
+        waits[job.user_id].append(clock - arrivals.pop(job.job_id))
+        room.record_generation_time(SERVICE_TIME)
+        served_window[job.user_id] += 1
+        dispatched += 1
+        clock += SERVICE_TIME
+
+        # A window covers at least one turn for everyone who was waiting when it opened
+        window = dispatched - window_start
+        if window >= FAIRNESS_WINDOW and window >= len(demand_window):
+            alloc = water_fill(demand_window, window)
+            fairness.append(jain([served_window[u] / a for u, a in alloc.items() if a > 0]))
+            served_window.clear()
+            demand_window = Counter(j.user_id for j in room.pending_jobs)
+            window_start = dispatched
+
+    all_waits = [w for user_waits in waits.values() for w in user_waits]
+    worst_user_mean = max((sum(w) / len(w) for w in waits.values()), default=0.0)
+    return {
+        "jobs_dispatched": dispatched,
+        "jobs_cancelled": cancelled,
+        "truncated": truncated,
+        "wall_s": round(time.perf_counter() - wall_start, 3),
+        "ops_us": {name: percentiles(samples, 1e6) for name, samples in sorted(timer.samples.items())},
+        "wait_s": percentiles(all_waits),
+        "worst_user_mean_wait_s": round(worst_user_mean, 3),
+        "jain_index": {
+            "mean": round(sum(fairness) / len(fairness), 4) if fairness else 1.0,
+            "min": round(min(fairness), 4) if fairness else 1.0
+        }
+    }
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark RoomState scheduling and fairness")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Users per room")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--budget", type=float, default=20.0,
+                        help="Wall-clock seconds per run before it is cut short (marked truncated)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Save results to this JSON file")
+    parser.add_argument("--compare", help="Compare with a saved results file")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = {}
+
+    print(f"{'scenario':<12}{'users':>7}{'jobs':>8}{'get_next p99 us':>17}{'enqueue p99 us':>16}"
+          f"{'wait p99 s':>12}{'jain':>8}")
+    for name in args.scenarios:
+        for users in args.sizes:
+            events = SCENARIOS[name](users, random.Random(args.seed))
+            result = simulate(events, args.budget)
+            results[f"{name}.{users}"] = result
+            ops = result["ops_us"]
+            print(f"{name:<12}{users:>7}{result['jobs_dispatched']:>8}"
+                  f"{ops.get('get_next_job', {}).get('p99', 0):>17.1f}{ops.get('enqueue_job', {}).get('p99', 0):>16.1f}"
+                  f"{result['wait_s'].get('p99', 0):>12.1f}{result['jain_index']['mean']:>8.3f}"
+                  f"{'  (truncated)' if result['truncated'] else ''}")
+
+    config = {"sizes": args.sizes, "scenarios": args.scenarios, "budget": args.budget, "seed": args.seed,
+              "service_time": SERVICE_TIME, "fairness_window": FAIRNESS_WINDOW}
+    if args.output:
+        save(args.output, "bench_scheduler", config, results)
+    if args.compare:
+        return 0 if compare(results, args.compare) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Gummy Bench Common - Percentiles, result files, regression comparison and process helpers
+Shared by the scripts in bench/
+"""
+
+import json
+import os
+import platform
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+REGRESSION_THRESHOLD = 0.10  # Flag metrics that got >10% worse
+
+# Metrics where a bigger number is better; everything else is "lower is better"
+HIGHER_IS_BETTER = ("throughput", "per_second", "jain", "completed", "dispatched", "requests_ok",
+                    "efficiency", "max_concurrency")
+
+def percentiles(values: List[float], scale: float = 1.0) -> Dict[str, float]:
+    """p50/p90/p99/max/mean of a sample, multiplied by scale (e.g. 1000 for ms)"""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pick(p: float) -> float:
+        return round(scale * ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+
+    return {
+        "count": len(ordered),
+        "mean": round(scale * sum(ordered) / len(ordered), 3),
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "max": round(scale * ordered[-1], 3)
+    }
+
+def _proc_status(pid: Optional[int], field: str) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid or os.getpid()}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Resident memory of a process in MiB (Linux /proc), or None if unavailable"""
+    value = _proc_status(pid, "VmRSS")
+    return None if value is None else round(value / 1024, 1)
+
+def thread_count(pid: Optional[int] = None) -> Optional[int]:
+    """OS threads in a process (Linux /proc), or None if unavailable"""
+    return _proc_status(pid, "Threads")
+
+def wait_for(url: str, timeout: float = 20.0):
+    """Poll a URL until it answers, e.g. a server started as a child process"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+def save(path: str, name: str, config: dict, results: dict):
+    """Write a result file with enough context to compare runs later"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "benchmark": name,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+            "config": config,
+            "results": results
+        }, f, indent=2)
+    print(f"Saved results to {path}")
+
+def _flatten(data: dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+def compare(current: dict, baseline_path: str, threshold: float = REGRESSION_THRESHOLD) -> bool:
+    """Print metric changes against a saved run; returns False if anything regressed"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    old, new = _flatten(baseline["results"]), _flatten(current)
+    ok = True
+    print(f"\nCompared with {baseline_path} ({baseline.get('created_at', '?')}):")
+    for name in sorted(set(old) & set(new)):
+        if name.endswith(".count") or old[name] == 0:
+            continue
+        change = (new[name] - old[name]) / abs(old[name])
+        worse = -change if any(h in name for h in HIGHER_IS_BETTER) else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        ok = ok and not flag
+        print(f"  {name:<45} {old[name]:>12.3f} -> {new[name]:>12.3f}  ({change:+.1%}){flag}")
+    return ok
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Gummy Fake Ollama - Stand-in Ollama server for benchmarks, no GPU needed
+Streams NDJSON for /api/chat and /api/generate at a configurable rate, time to first
+token and failure rate. Run: python3 bench/fake_ollama.py --port 11500 --tokens-per-second 40
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+
+from aiohttp import web
+
+WORDS = ("the quick brown fox jumps over a lazy dog while gummy bears "
+         "stream tokens to every user in the room and nobody waits too long").split()
+
+@dataclass
+class FakeConfig:
+    tokens_per_second: float = 30.0
+    ttft: float = 0.2  # Seconds before the first token (prompt evaluation)
+    tokens: int = 64  # Tokens per response unless options.num_predict is set
+    failure_rate: float = 0.0  # Fraction of requests answered with HTTP 500
+    load_time: float = 0.0  # Seconds to "load" a model that isn't resident
+    jitter: float = 0.1  # +/- fraction applied to each token interval
+
+class FakeOllama:
+    """Request handlers plus the little state a real server would have"""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.resident = {}  # model -> expires_at
+        self.requests = 0
+        self.failures = 0
+        self.active = 0
+
+    async def _load(self, model: str, keep_alive) -> int:
+        """Simulate loading a model; returns load_duration in ns"""
+        now = time.time()
+        loaded = self.resident.get(model, 0) > now
+        if keep_alive in (0, "0"):
+            self.resident.pop(model, None)
+            return 0
+        self.resident[model] = now + 300
+        if loaded or not self.config.load_time:
+            return 1_000_000
+        await asyncio.sleep(self.config.load_time)
+        return int(self.config.load_time * 1e9)
+
+    def _tokens(self, body: dict) -> int:
+        return int((body.get("options") or {}).get("num_predict") or self.config.tokens)
+
+    def _interval(self) -> float:
+        base = 1.0 / self.config.tokens_per_second
+        return base * random.uniform(1 - self.config.jitter, 1 + self.config.jitter)
+
+    def _done(self, body: dict, load_ns: int, prompt_tokens: int, eval_tokens: int, started: float) -> dict:
+        eval_ns = int(eval_tokens / self.config.tokens_per_second * 1e9)
+        return {
+            "model": body.get("model", ""),
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((time.time() - started) * 1e9),
+            "load_duration": load_ns,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(self.config.ttft * 1e9),
+            "eval_count": eval_tokens,
+            "eval_duration": eval_ns
+        }
+
+    async def _generate(self, request: web.Request, chat: bool) -> web.StreamResponse:
+        started = time.time()
+        body = await request.json()
+        self.requests += 1
+
+        if random.random() < self.config.failure_rate:
+            self.failures += 1
+            return web.json_response({"error": "simulated failure"}, status=500)
+
+        load_ns = await self._load(body.get("model", ""), body.get("keep_alive"))
+        prompt = body.get("messages") if chat else body.get("prompt")
+        if not prompt:
+            # Empty prompt: Ollama just loads (or unloads) the model
+            return web.json_response({"model": body.get("model", ""), "done": True, "done_reason": "load"})
+
+        prompt_tokens = len(json.dumps(prompt)) // 4
+        count = self._tokens(body)
+
+        def chunk(text: str) -> dict:
+            if chat:
+                return {"model": body.get("model", ""), "message": {"role": "assistant", "content": text}, "done": False}
+            return {"model": body.get("model", ""), "response": text, "done": False}
+
+        self.active += 1
+        try:
+            await asyncio.sleep(self.config.ttft)
+            words = [random.choice(WORDS) + " " for _ in range(count)]
+
+            if body.get("stream", True) is False:
+                await asyncio.sleep(count / self.config.tokens_per_second)
+                final = self._done(body, load_ns, prompt_tokens, count, started)
+                final.update({"message": {"role": "assistant", "content": "".join(words)}} if chat
+                             else {"response": "".join(words)})
+                return web.json_response(final)
+
+            response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await response.prepare(request)
+            for word in words:
+                await response.write((json.dumps(chunk(word)) + "\n").encode())
+                await asyncio.sleep(self._interval())
+            final = chunk("")
+            final.update(self._done(body, load_ns, prompt_tokens, count, started))
+            await response.write((json.dumps(final) + "\n").encode())
+            await response.write_eof()
+            return response
+        finally:
+            self.active -= 1
+
+    async def chat(self, request: web.Request):
+        return await self._generate(request, chat=True)
+
+    async def generate(self, request: web.Request):
+        return await self._generate(request, chat=False)
+
+    async def tags(self, request: web.Request):
+        names = sorted(set(self.resident) | {"gemma3:4b", "llama3.2", "deepseek-coder:6.7b"})
+        return web.json_response({"models": [{"name": n, "size": 0, "modified_at": ""} for n in names]})
+
+    async def ps(self, request: web.Request):
+        now = time.time()
+        return web.json_response({"models": [{"name": m} for m, exp in self.resident.items() if exp > now]})
+
+    async def show(self, request: web.Request):
+        return web.json_response({"details": {"family": "fake", "parameter_size": "0B"}, "capabilities": ["completion"]})
+
+    async def version(self, request: web.Request):
+        return web.json_response({"version": "0.0.0-fake"})
+
+    async def stats(self, request: web.Request):
+        return web.json_response({"requests": self.requests, "failures": self.failures, "active": self.active})
+
+def create_app(config: FakeConfig) -> web.Application:
+    fake = FakeOllama(config)
+    app = web.Application()
+    app.add_routes([
+        web.post("/api/chat", fake.chat),
+        web.post("/api/generate", fake.generate),
+        web.get("/api/tags", fake.tags),
+        web.get("/api/ps", fake.ps),
+        web.post("/api/show", fake.show),
+        web.get("/api/version", fake.version),
+        web.get("/fake/stats", fake.stats)
+    ])
+    return app
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fake Ollama server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--tokens-per-second", type=float, default=FakeConfig.tokens_per_second)
+    parser.add_argument("--ttft", type=float, default=FakeConfig.ttft, help="Seconds before the first token")
+    parser.add_argument("--tokens", type=int, default=FakeConfig.tokens, help="Tokens per response")
+    parser.add_argument("--failure-rate", type=float, default=FakeConfig.failure_rate)
+    parser.add_argument("--load-time", type=float, default=FakeConfig.load_time,
+                        help="Seconds to load a model that isn't resident")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = FakeConfig(args.tokens_per_second, args.ttft, args.tokens, args.failure_rate, args.load_time)
+    print(f"Fake Ollama on http://{args.host}:{args.port} "
+          f"({config.tokens_per_second} tok/s, ttft {config.ttft}s, failure rate {config.failure_rate})")
+    web.run_app(create_app(config), host=args.host, port=args.port, print=None)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Gummy Collaborative Load Test - N WebSocket users across M rooms
+Drives collaborative_app and reports time to first token, fan-out lag between users in a
+room, throughput and server memory. Results can be saved and compared across runs.
+Run: python3 bench/load_collab.py --spawn --rooms 4 --users 10 --messages 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from common import compare, percentiles, rss_mb, save, wait_for
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, "bench")
+
+class Recorder:
+    """Measurements shared by every simulated user"""
+
+    def __init__(self):
+        self.ttft: List[float] = []
+        self.latency: List[float] = []
+        self.chunks: Dict[tuple, list] = {}  # (room, thread, job, index) -> [first_seen, last_seen]
+        self.completed = 0
+        self.timeouts = 0
+        self.shed = 0
+        self.frames = 0
+        self.tokens = 0
+        self.users = 0
+        self.joined = 0
+        self.all_joined = asyncio.Event()
+
+    def chunk(self, key: tuple, now: float):
+        seen = self.chunks.get(key)
+        if seen is None:
+            self.chunks[key] = [now, now]
+        else:
+            seen[1] = now
+
+    def fanout_lag(self) -> List[float]:
+        return [last - first for first, last in self.chunks.values()]
+
+async def simulate_user(session: aiohttp.ClientSession, ws_url: str, room_id: str, index: int,
+                        rec: Recorder, args: argparse.Namespace):
+    """Join a room, wait for everyone, then chat and watch every stream in the room"""
+    async with session.ws_connect(f"{ws_url}/ws/{room_id}", max_msg_size=0) as ws:
+        await ws.send_json({"type": "join", "nickname": f"bench{index}"})
+        thread_id = None
+        while thread_id is None:
+            message = json.loads((await ws.receive()).data)
+            if message["type"] == "joined":
+                thread_id = message["thread_id"]
+
+        jobs: Dict[str, list] = {}  # thread_id -> [job number, chunk index]
+        state = {"sent_at": None, "first": None, "done": asyncio.Event(), "shed": False}
+
+        async def reader():
+            async for frame in ws:
+                if frame.type != aiohttp.WSMsgType.TEXT:
+                    break
+                now = time.perf_counter()
+                message = json.loads(frame.data)
+                rec.frames += 1
+                kind = message["type"]
+                thread = message.get("thread_id")
+
+                if kind == "generation_start":
+                    jobs[thread] = [jobs.get(thread, [0, 0])[0] + 1, 0]
+                elif kind == "chunk":
+                    job = jobs.setdefault(thread, [1, 0])
+                    rec.chunk((room_id, thread, job[0], job[1]), now)
+                    job[1] += 1
+                    if thread == thread_id:
+                        rec.tokens += 1
+                        if state["first"] is None:
+                            state["first"] = now
+                elif kind == "generation_done" and thread == thread_id:
+                    state["done"].set()
+                elif kind == "error":
+                    state["shed"] = True
+                    state["done"].set()
+
+        reading = asyncio.create_task(reader())
+        rec.joined += 1
+        if rec.joined == rec.users:
+            rec.all_joined.set()
+        await rec.all_joined.wait()
+
+        try:
+            for n in range(args.messages):
+                await ws.send_json({"type": "typing", "is_typing": True})
+                await asyncio.sleep(args.think_time)
+
+                state.update({"sent_at": time.perf_counter(), "first": None, "shed": False})
+                state["done"].clear()
+                await ws.send_json({"type": "message", "content": f"Benchmark message {n} from user {index}"})
+                try:
+                    await asyncio.wait_for(state["done"].wait(), args.timeout)
+                except asyncio.TimeoutError:
+                    rec.timeouts += 1
+                    continue
+
+                if state["shed"]:
+                    rec.shed += 1
+                    continue
+                rec.completed += 1
+                rec.latency.append(time.perf_counter() - state["sent_at"])
+                if state["first"] is not None:
+                    rec.ttft.append(state["first"] - state["sent_at"])
+        finally:
+            reading.cancel()
+
+async def sample_memory(pid: Optional[int], samples: List[float], stop: asyncio.Event):
+    while pid and not stop.is_set():
+        value = rss_mb(pid)
+        if value is not None:
+            samples.append(value)
+        await asyncio.sleep(0.5)
+
+async def run(args: argparse.Namespace, server_pid: Optional[int]) -> dict:
+    ws_url = args.url.replace("http", "ws", 1)
+    rec = Recorder()
+    memory: List[float] = []
+    stop = asyncio.Event()
+
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        rooms = []
+        for _ in range(args.rooms):
+            async with session.post(f"{args.url}/api/create-room") as resp:
+                rooms.append((await resp.json())["room_id"])
+
+        memory_task = asyncio.create_task(sample_memory(server_pid, memory, stop))
+        rec.users = args.rooms * args.users
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            simulate_user(session, ws_url, room_id, r * args.users + u, rec, args)
+            for r, room_id in enumerate(rooms) for u in range(args.users)
+        ))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await memory_task
+
+        traces = []
+        try:
+            async with session.get(f"{args.url}/api/traces", params={"limit": "500"}) as resp:
+                traces = await resp.json()
+        except aiohttp.ClientError:
+            pass
+
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "jobs_completed": rec.completed,
+        "jobs_timed_out": rec.timeouts,
+        "jobs_shed": rec.shed,
+        "ttft_ms": percentiles(rec.ttft, 1000),
+        "latency_ms": percentiles(rec.latency, 1000),
+        "fanout_lag_ms": percentiles(rec.fanout_lag(), 1000),
+        "server_queue_ms": percentiles([t["phases_ms"].get("queue", 0) / 1000 for t in traces], 1000),
+        "throughput": {
+            "jobs_per_second": round(rec.completed / elapsed, 3),
+            "tokens_per_second": round(rec.tokens / elapsed, 1),
+            "frames_per_second": round(rec.frames / elapsed, 1)
+        },
+        "server_rss_mb": {"start": memory[0], "peak": max(memory), "end": memory[-1]} if memory else {}
+    }
+
+def spawn(args: argparse.Namespace) -> list:
+    """Start the fake Ollama and the collaborative server as child processes"""
+    fake = subprocess.Popen([
+        sys.executable, os.path.join(BENCH_DIR, "fake_ollama.py"), "--port", str(args.fake_port),
+        "--tokens-per-second", str(args.tokens_per_second), "--ttft", str(args.ttft),
+        "--tokens", str(args.tokens), "--failure-rate", str(args.failure_rate)
+    ], stdout=subprocess.DEVNULL)
+    wait_for(f"http://127.0.0.1:{args.fake_port}/api/version")
+
+    env = dict(os.environ, OLLAMA_BASE_URL=f"http://127.0.0.1:{args.fake_port}", LOG_LEVEL="WARNING",
+               HISTORY_DIR=tempfile.mkdtemp(prefix="gummy-bench-"), WORKERS=str(args.workers))
+    port = args.url.rsplit(":", 1)[-1]
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "collaborative_app:app", "--port", port,
+                               "--log-level", "warning"], cwd=ROOT, env=env)
+    wait_for(f"{args.url}/")
+    return [server, fake]
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test collaborative_app over WebSockets")
+    parser.add_argument("--url", default="http://127.0.0.1:5006", help="Collaborative server base URL")
+    parser.add_argument("--rooms", type=int, default=2)
+    parser.add_argument("--users", type=int, default=5, help="Users per room")
+    parser.add_argument("--messages", type=int, default=2, help="Messages each user sends")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Seconds of typing before each message")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for a reply")
+    parser.add_argument("--server-pid", type=int, help="PID to sample memory from (set automatically with --spawn)")
+    parser.add_argument("--output", help="Save results to this JSON file")
+    parser.add_argument("--compare", help="Compare with a saved results file")
+
+    spawned = parser.add_argument_group("--spawn: start fake Ollama and the server locally")
+    spawned.add_argument("--spawn", action="store_true")
+    spawned.add_argument("--fake-port", type=int, default=11500)
+    spawned.add_argument("--workers", type=int, default=1, help="WORKERS per room")
+    spawned.add_argument("--tokens-per-second", type=float, default=30.0)
+    spawned.add_argument("--ttft", type=float, default=0.2)
+    spawned.add_argument("--tokens", type=int, default=64)
+    spawned.add_argument("--failure-rate", type=float, default=0.0)
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    children = spawn(args) if args.spawn else []
+    try:
+        results = asyncio.run(run(args, children[0].pid if children else args.server_pid))
+    finally:
+        for child in children:
+            child.terminate()
+            child.wait()
+
+    print(json.dumps(results, indent=2))
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "server_pid")}
+    if args.output:
+        save(args.output, "load_collab", config, results)
+    if args.compare:
+        return 0 if compare(results, args.compare) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,28 +5,83 @@ FastAPI WebSocket server with fair job queuing and live streaming mirrors
 """
 
 import asyncio
+import contextvars
 import json
 import uuid
 import time
 import random
-import socket
+import signal
 import os
+import threading
 from collections import deque
 from dataclasses import dataclass, asdict
 from typing import Dict, List, Optional, Set
 from datetime import datetime
 
 import aiohttp
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import Depends, FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request, Response
 from fastapi.responses import HTMLResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
-import uvicorn
+
+from backend_router import BackendRouter
+from history_store import RoomHistoryLog, message_size
+from job_trace import JobTrace, TraceBuffer
+from loop_monitor import LOOP_MONITOR, LoopMonitor
+from metrics import CONTENT_TYPE, FAST_BUCKETS, RATE_BUCKETS, Registry
+from model_residency import ModelResidency
+from ollama_client import GENERATION_OPTIONS, OllamaClient
+from page_cache import StaticPage, is_not_modified
+from profiling import ADMIN_TOKEN, AdminTools, Breakdown, check_token, fastapi_router, token_from_headers
+from rate_limit import MAX_NICKNAME_CHARS, ConnectionLimiter, shed
+from response_cache import replay_chunks, response_cache
+from room_bus import create_bus
+import static_pipeline
+from tunnel_status import tunnel
+from structured_log import bind, get_logger
+from summarizer import ThreadSummary, build_context, cold_turns, summarize
 
 # Configuration
-OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_BACKENDS = [u.strip() for u in os.environ.get("OLLAMA_BACKENDS", OLLAMA_BASE_URL).split(",") if u.strip()]
+BACKEND_MAX_INFLIGHT = int(os.environ.get("BACKEND_MAX_INFLIGHT", "2"))  # Spill to the next backend beyond this
 DEFAULT_MODEL = "gemma3:4b"
 MAX_WORKERS = int(os.environ.get("WORKERS", "1"))  # Default to 1 worker
-MAX_THREAD_HISTORY = 50  # Ring buffer size for thread context
+MAX_THREAD_HISTORY = 50  # In-memory tail per thread; older messages spill to disk
+CONTEXT_WINDOW = 20  # Recent messages sent to Ollama with each job
+
+# Rolling summarization of turns that fall out of the context window
+SUMMARIZE = os.environ.get("SUMMARIZE", "0") == "1"
+SUMMARY_MODEL = os.environ.get("SUMMARY_MODEL", DEFAULT_MODEL)  # Point at a small model to keep it cheap
+SUMMARY_MIN_TURNS = 4  # Batch at least this many cold turns per summary call
+
+# Start loading the model when someone starts typing into an idle room
+WARMUP_ON_TYPING = os.environ.get("WARMUP_ON_TYPING", "1") == "1"
+WARMUP_INTERVAL = 30.0  # Seconds between typing-triggered warmups per room
+
+# Typing presence, coalesced into one room frame per interval
+PRESENCE_INTERVAL = 0.5  # Seconds between presence frames (only sent when something changed)
+TYPING_TTL = 5.0  # Drop a typing user who stops refreshing (e.g. lost the stop event)
+
+# Tiered thread history: hot tail in memory, cold messages in a per-room append log
+HISTORY_DIR = os.environ.get("HISTORY_DIR", "history")
+ROOM_MEMORY_CAP = int(os.environ.get("ROOM_MEMORY_CAP", str(4 * 1024 * 1024)))  # Bytes of history per room
+HISTORY_PAGE_SIZE = 50
+
+# Graceful shutdown: on SIGTERM stop admitting jobs and let running generations finish
+DRAIN_TIMEOUT = float(os.environ.get("DRAIN_TIMEOUT", "30"))  # Seconds to wait (0 disables draining)
+DRAINED_JOBS_FILE = "drained-jobs.jsonl"  # In HISTORY_DIR: queued jobs no other process took over
+
+# Room bus for running several server processes (ROOM_BUS=sqlite) on one host
+ROOM_BUS = os.environ.get("ROOM_BUS", "local")
+ROOM_BUS_PATH = os.environ.get("ROOM_BUS_PATH", "gummy-bus.sqlite3")
+
+# Room page, read once at startup and revalidated with ETags
+ROOM_TEMPLATE_PATH = "static/collaborative.html"
+ROOM_ID_PLACEHOLDER = "window.ROOM_ID = 'loading...';"
+ROOM_PAGE_CACHE_CONTROL = "no-cache"  # Browsers keep a copy but revalidate (cheap 304)
+
+# Minified, fingerprinted, precompressed assets under /static/dist, built at startup
+STATIC_PIPELINE = os.environ.get("STATIC_PIPELINE", "1") == "1"
 
 # Friendly animal names for random user IDs
 ANIMAL_NAMES = ["llama", "alpaca", "vicuna", "guanaco", "camel", "dromedary"]
@@ -35,7 +90,7 @@ ANIMAL_NAMES = ["llama", "alpaca", "vicuna", "guanaco", "camel", "dromedary"]
 class UserInfo:
     user_id: str
     nickname: str
-    websocket: WebSocket
+    websocket: Optional[WebSocket]  # None when the socket lives on another process
     joined_at: float
     thread_id: str
 
@@ -47,17 +102,29 @@ class Job:
     user_id: str
     messages: List[dict]
     enqueued_at: float
+    trace: Optional[JobTrace] = None
+
+    def __post_init__(self):
+        if self.trace is None:
+            self.trace = JobTrace(self.enqueued_at)
 
 class RoomState:
     def __init__(self, room_id: str):
         self.room_id = room_id
         self.users: Dict[str, UserInfo] = {}
         self.threads: Dict[str, List[dict]] = {}  # thread_id -> message history
+        self.summaries: Dict[str, ThreadSummary] = {}  # thread_id -> running summary
+        self.history_log = RoomHistoryLog(HISTORY_DIR, room_id)
+        self.history_bytes = 0  # Estimated bytes of in-memory thread history
         self.pending_jobs: deque = deque()
         self.rr_order: deque = deque()  # Round-robin order of user_ids
         self.current_job: Optional[Job] = None
         self.worker_count = 0
+        self.tasks: List[asyncio.Task] = []  # Workers, only on the owning process
         self.created_at = time.time()
+        self.last_warmup = 0.0  # Last typing-triggered model warmup
+        self.typing: Dict[str, tuple] = {}  # user_id -> (thread_id, expires_at)
+        self.presence_dirty = False
         
         # Performance tracking for ETA estimation
         self.generation_times: deque = deque(maxlen=20)  # Rolling window
@@ -86,6 +153,37 @@ class RoomState:
         
         # Cancel any pending jobs for this user
         self.pending_jobs = deque([job for job in self.pending_jobs if job.user_id != user_id])
+        
+        if self.typing.pop(user_id, None) is not None:
+            self.presence_dirty = True
+
+    def set_typing(self, user_id: str, thread_id: str, is_typing: bool):
+        """Record typing state; only start/stop edges change the next presence frame"""
+        if is_typing:
+            if user_id not in self.typing:
+                self.presence_dirty = True
+            self.typing[user_id] = (thread_id, time.time() + TYPING_TTL)
+        elif self.typing.pop(user_id, None) is not None:
+            self.presence_dirty = True
+
+    def presence_frame(self) -> Optional[dict]:
+        """Expire stale typing state and build a presence frame if anything changed"""
+        now = time.time()
+        for user_id, (_, expires_at) in list(self.typing.items()):
+            if expires_at < now or user_id not in self.users:
+                del self.typing[user_id]
+                self.presence_dirty = True
+        
+        if not self.presence_dirty:
+            return None
+        self.presence_dirty = False
+        return {
+            "type": "presence",
+            "typing": [
+                {"user_id": user_id, "thread_id": thread_id, "nickname": self.users[user_id].nickname}
+                for user_id, (thread_id, _) in self.typing.items()
+            ]
+        }
 
     def enqueue_job(self, job: Job) -> int:
         """Enqueue job and return position in queue"""
@@ -141,9 +239,144 @@ class RoomState:
         """Record generation time for ETA estimation"""
         self.generation_times.append(duration)
 
+    def append_message(self, thread_id: str, message: dict):
+        """Append a message to a thread, spilling cold history to disk"""
+        history = self.threads.setdefault(thread_id, [])
+        history.append(message)
+        self.history_bytes += message_size(message)
+
+        if len(history) > MAX_THREAD_HISTORY:
+            self.spill(thread_id, len(history) - MAX_THREAD_HISTORY)
+
+        if self.history_bytes > ROOM_MEMORY_CAP:
+            self.enforce_memory_cap()
+
+    def spillable(self, thread_id: str, count: int) -> int:
+        """How many of the oldest count messages can leave memory without dropping out of the summary"""
+        if not SUMMARIZE:
+            return count
+        # The summarizer only sees turns still in memory, so keep the ones it hasn't folded in yet
+        covered_until = self.summaries.get(thread_id, ThreadSummary()).covered_until
+        history = self.threads[thread_id]
+        spillable = 0
+        while spillable < count and history[spillable].get("timestamp", 0) <= covered_until:
+            spillable += 1
+        return spillable
+
+    def spill(self, thread_id: str, count: int):
+        """Move the oldest messages of a thread from memory to the history log"""
+        count = self.spillable(thread_id, count)
+        if not count:
+            return
+        history = self.threads[thread_id]
+        cold = history[:count]
+        self.history_log.append(thread_id, cold)
+        self.threads[thread_id] = history[count:]
+        self.history_bytes -= sum(message_size(m) for m in cold)
+
+    def enforce_memory_cap(self):
+        """Spill the largest threads until the room fits its memory cap"""
+        for thread_id in sorted(self.threads, key=lambda t: len(self.threads[t]), reverse=True):
+            if self.history_bytes <= ROOM_MEMORY_CAP:
+                break
+            excess = len(self.threads[thread_id]) - CONTEXT_WINDOW
+            if excess > 0:
+                self.spill(thread_id, excess)
+
+    async def history_page(self, thread_id: str, before: Optional[int] = None,
+                           limit: int = HISTORY_PAGE_SIZE) -> dict:
+        """Read a page of thread history ending before the given absolute index"""
+        # Snapshot the in-memory tail now: spills already queued are in the log by the time the page runs
+        in_memory = list(self.threads.get(thread_id, []))
+        return await self.history_log.run(self._history_page, thread_id, in_memory, before, limit)
+
+    def _history_page(self, thread_id: str, in_memory: List[dict], before: Optional[int], limit: int) -> dict:
+        spilled = self.history_log.count(thread_id)
+        total = spilled + len(in_memory)
+
+        stop = total if before is None else max(0, min(before, total))
+        start = max(0, stop - limit)
+
+        messages = self.history_log.read(thread_id, start, min(stop, spilled))
+        messages += in_memory[max(start - spilled, 0):max(stop - spilled, 0)]
+        return {"messages": messages, "start": start, "total": total}
+
+    def memory_stats(self) -> dict:
+        """Report history memory accounting for this room"""
+        return {
+            "history_bytes": self.history_bytes,
+            "memory_cap": ROOM_MEMORY_CAP,
+            "in_memory_messages": sum(len(h) for h in self.threads.values()),
+            "spilled_messages": self.history_log.spilled(),
+            "log_bytes": self.history_log.size
+        }
+
+    def is_idle(self) -> bool:
+        """Check whether no job is running or waiting"""
+        return self.current_job is None and not self.pending_jobs
+
+    def build_messages(self, thread_id: str) -> List[dict]:
+        """Build prompt messages for a thread: running summary plus recent window"""
+        summary = self.summaries.get(thread_id, ThreadSummary())
+        return build_context(self.threads.get(thread_id, []), summary, CONTEXT_WINDOW)
+
 # Global room state
 rooms: Dict[str, RoomState] = {}
 
+def load_room_template() -> Optional[str]:
+    """Read the room page template once, or None to use the inline fallback"""
+    try:
+        with open(ROOM_TEMPLATE_PATH, 'r') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+room_template = load_room_template()
+room_pages: Dict[str, StaticPage] = {}  # room_id -> rendered page
+
+# Shares rooms between processes; the local bus owns every room
+bus = create_bus(ROOM_BUS, ROOM_BUS_PATH)
+
+# Thread-to-backend affinity so Ollama can reuse cached prompt prefixes
+router = BackendRouter(OLLAMA_BACKENDS, BACKEND_MAX_INFLIGHT)
+
+# Finished job traces for /api/traces
+traces = TraceBuffer()
+
+# Event loop lag and stall stacks for /api/loop
+loop_monitor = LoopMonitor()
+
+# Keeps the chat model loaded on every backend while rooms are active
+residency = {url: ModelResidency(OllamaClient(url)) for url in OLLAMA_BACKENDS}
+
+log = get_logger("collab")
+
+# Prometheus metrics at /metrics; gauges are read from room state at scrape time
+registry = Registry()
+QUEUE_WAIT = registry.histogram("gummy_queue_wait_seconds", "Time from enqueue until a worker starts the job")
+TTFT = registry.histogram("gummy_time_to_first_token_seconds", "Time from job start to the first streamed chunk")
+TOKENS_PER_SECOND = registry.histogram("gummy_tokens_per_second", "Ollama eval rate per job", RATE_BUCKETS)
+FANOUT = registry.histogram("gummy_broadcast_seconds", "Time to deliver one frame to a room's local sockets",
+                            FAST_BUCKETS)
+SEND_FAILURES = registry.counter("gummy_send_failures_total", "WebSocket sends that raised")
+JOBS = registry.counter("gummy_jobs_total", "Finished jobs by outcome", ["outcome"])
+registry.gauge("gummy_rooms", "Rooms held by this process", lambda: len(rooms))
+registry.gauge("gummy_connected_users", "Users with a socket on this process",
+               lambda: sum(1 for r in rooms.values() for u in r.users.values() if u.websocket))
+registry.gauge("gummy_queue_depth", "Pending jobs across rooms",
+               lambda: sum(len(r.pending_jobs) for r in rooms.values()))
+# No per-room label: /metrics is unauthenticated and room IDs are what keep rooms private
+registry.gauge("gummy_room_queue_depth_max", "Pending jobs in the most backed-up room this process owns",
+               lambda: max((len(r.pending_jobs) for r in rooms.values() if r.tasks), default=0))
+registry.gauge("gummy_active_workers", "Worker tasks running", lambda: sum(r.worker_count for r in rooms.values()))
+registry.gauge("gummy_active_generations", "Rooms with a job streaming",
+               lambda: sum(r.current_job is not None for r in rooms.values()))
+registry.gauge("gummy_backend_in_flight", "Requests in flight per Ollama backend",
+               lambda: {(url,): n for url, n in router.in_flight.items()}, ["backend"])
+registry.callback_counter("gummy_ws_shed_frames_total", "Inbound frames rejected by WebSocket limits",
+               lambda: dict(shed.counts), ["reason", "type"])
+loop_monitor.register(registry)
+
 # FastAPI app
 app = FastAPI(title="Gummy Collaborative", version="1.0.0")
 
@@ -157,26 +390,18 @@ def generate_user_id() -> str:
     number = random.randint(1, 999)
     return f"{animal}-{number}"
 
-def get_local_ip():
-    """Get the local IP address"""
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
-        return ip
-    except:
-        return "Unable to determine"
-
-async def stream_ollama(messages: List[dict], model: str = DEFAULT_MODEL):
-    """Stream from Ollama API"""
+async def stream_ollama(messages: List[dict], model: str = DEFAULT_MODEL,
+                        base_url: str = OLLAMA_BASE_URL, stats: Optional[dict] = None,
+                        trace: Optional[JobTrace] = None):
+    """Stream from Ollama API, filling stats from the final chunk when given"""
     async with aiohttp.ClientSession() as session:
         try:
             async with session.post(
-                f"{OLLAMA_BASE_URL}/api/chat",
+                f"{base_url}/api/chat",
                 json={
                     "model": model,
                     "messages": messages,
+                    "options": GENERATION_OPTIONS,
                     "stream": True
                 },
                 timeout=aiohttp.ClientTimeout(total=120)
@@ -186,12 +411,17 @@ async def stream_ollama(messages: List[dict], model: str = DEFAULT_MODEL):
                     return
                 
                 async for line in resp.content:
+                    if trace is not None:
+                        trace.mark("first_byte")
+                        trace = None  # Only the first line matters
                     if line:
                         try:
                             chunk = json.loads(line.decode('utf-8'))
                             content = chunk.get("message", {}).get("content", "")
                             if content:
                                 yield content
+                            if chunk.get("done") and stats is not None:
+                                stats.update({k: v for k, v in chunk.items() if k.endswith(("_count", "_duration"))})
                         except json.JSONDecodeError:
                             continue
         except asyncio.TimeoutError:
@@ -199,23 +429,58 @@ async def stream_ollama(messages: List[dict], model: str = DEFAULT_MODEL):
         except Exception as e:
             yield f"Error: {str(e)}"
 
+async def replay_cached(text: str):
+    """Replay a cached response as a stream of chunks"""
+    for delta in replay_chunks(text):
+        yield delta
+
 async def broadcast_to_room(room_id: str, message: dict, exclude_user: Optional[str] = None):
-    """Broadcast message to all users in room"""
+    """Broadcast message to all users in room, including those on other processes"""
+    await deliver_local(room_id, message, exclude_user)
+    
+    room = rooms.get(room_id)
+    if bus.distributed and room and any(u.websocket is None for u in room.users.values()):
+        bus.publish(room_id, {"kind": "broadcast", "message": message, "exclude_user": exclude_user})
+
+async def send_local(room_id: str, user_id: str, message: dict) -> bool:
+    """Send a message to a user whose socket is on this process"""
+    room = rooms.get(room_id)
+    user_info = room.users.get(user_id) if room else None
+    if not user_info or not user_info.websocket:
+        return False
+    
+    try:
+        await user_info.websocket.send_text(json.dumps(message))
+    except:
+        SEND_FAILURES.inc()
+    return True
+
+async def send_to_user(room_id: str, user_id: str, message: dict):
+    """Send a message to one user, wherever their socket lives"""
+    if not await send_local(room_id, user_id, message) and bus.distributed:
+        bus.publish(room_id, {"kind": "direct", "user_id": user_id, "message": message})
+
+async def deliver_local(room_id: str, message: dict, exclude_user: Optional[str] = None):
+    """Send message to the users in room connected to this process"""
     if room_id not in rooms:
         return
     
     room = rooms[room_id]
     disconnected_users = []
+    start = time.perf_counter()
     
-    for user_id, user_info in room.users.items():
-        if exclude_user and user_id == exclude_user:
+    for user_id, user_info in list(room.users.items()):
+        if (exclude_user and user_id == exclude_user) or not user_info.websocket:
             continue
         
         try:
             await user_info.websocket.send_text(json.dumps(message))
         except:
+            SEND_FAILURES.inc()
             disconnected_users.append(user_id)
     
+    FANOUT.observe(time.perf_counter() - start)
+    
     # Clean up disconnected users
     for user_id in disconnected_users:
         room.remove_user(user_id)
@@ -228,25 +493,30 @@ async def worker_loop(room_id: str, worker_id: int):
     room = rooms[room_id]
     room.worker_count += 1
     
-    print(f"Worker {worker_id} started for room {room_id}")
+    bind(room_id=room_id, worker=worker_id)
+    log.info("Worker started")
     
     try:
         while room_id in rooms:  # Continue while room exists
-            job = room.get_next_job()
+            job = None if draining else room.get_next_job()
             
             if not job:
                 await asyncio.sleep(0.1)
                 continue
             
-            print(f"Worker {worker_id} processing job for user {job.user_id}")
+            bind(job_id=job.job_id, user_id=job.user_id)
+            log.debug("Processing job")
             
             # Check if user still exists
             if job.user_id not in room.users:
-                print(f"User {job.user_id} no longer exists, skipping job")
+                log.debug("User left, skipping job")
                 continue
             
             room.current_job = job
             start_time = time.time()
+            QUEUE_WAIT.observe(start_time - job.enqueued_at)
+            trace = job.trace
+            trace.mark("dispatched")
             
             # Announce generation start
             await broadcast_to_room(room_id, {
@@ -256,10 +526,28 @@ async def worker_loop(room_id: str, worker_id: int):
                 "nickname": room.users[job.user_id].nickname
             })
             
-            # Stream from Ollama
+            # Deterministic prompts may already have a cached answer
+            cache_key = response_cache.key_for(DEFAULT_MODEL, None, job.messages, GENERATION_OPTIONS)
+            cached = await asyncio.to_thread(response_cache.get, cache_key) if cache_key else None
+            
+            # Stream from Ollama, preferring the backend that served this thread before
             full_response = ""
+            backend = None
+            stats = {}
+            if cached is not None:
+                trace.mark("first_byte")
+                source = replay_cached(cached)
+            else:
+                backend = router.acquire(job.thread_id)
+                residency[backend].touch(DEFAULT_MODEL)
+                source = stream_ollama(job.messages, DEFAULT_MODEL, backend, stats, trace)
+            trace.info.update({"job_id": job.job_id, "room_id": room_id, "thread_id": job.thread_id,
+                               "backend": backend, "cached": cached is not None})
             try:
-                async for chunk in stream_ollama(job.messages, DEFAULT_MODEL):
+                async for chunk in source:
+                    first = not full_response
+                    if first:
+                        TTFT.observe(time.time() - start_time)
                     full_response += chunk
                     
                     # Broadcast chunk to all users
@@ -269,24 +557,34 @@ async def worker_loop(room_id: str, worker_id: int):
                         "user_id": job.user_id,
                         "delta": chunk
                     })
+                    if first:
+                        trace.mark("first_chunk_sent")
                 
                 # Add response to thread history
                 if job.thread_id in room.threads:
-                    room.threads[job.thread_id].append({
+                    room.append_message(job.thread_id, {
                         "role": "assistant",
                         "content": full_response,
                         "timestamp": time.time()
                     })
-                    
-                    # Trim history to max size
-                    if len(room.threads[job.thread_id]) > MAX_THREAD_HISTORY:
-                        room.threads[job.thread_id] = room.threads[job.thread_id][-MAX_THREAD_HISTORY:]
                 
                 # Record generation time
                 duration = time.time() - start_time
                 room.record_generation_time(duration)
+                if stats:
+                    # Final stats only arrive when Ollama finished cleanly
+                    trace.merge_ollama(stats)
+                    router.record(job.thread_id, backend, job.messages, stats)
+                    residency[backend].record_load(DEFAULT_MODEL, stats.get("load_duration", 0))
+                    if stats.get("eval_duration"):
+                        TOKENS_PER_SECOND.observe(stats.get("eval_count", 0) / (stats["eval_duration"] / 1e9))
+                    if cache_key:
+                        await asyncio.to_thread(response_cache.put, cache_key, full_response)
+                JOBS.inc(labels=("cached" if cached is not None else "ok" if stats else "error",))
                 
             except Exception as e:
+                JOBS.inc(labels=("error",))
+                log.warning("Generation failed: %s", e, extra={"backend": backend})
                 error_msg = f"Generation error: {str(e)}"
                 await broadcast_to_room(room_id, {
                     "type": "chunk",
@@ -294,21 +592,384 @@ async def worker_loop(room_id: str, worker_id: int):
                     "user_id": job.user_id,
                     "delta": error_msg
                 })
+            finally:
+                if backend:
+                    router.release(backend)
             
-            # Announce generation done
+            # Announce generation done, with where the time went
+            trace.mark("done")
+            summary = trace.to_dict()
+            traces.add(summary)
             await broadcast_to_room(room_id, {
                 "type": "generation_done",
                 "user_id": job.user_id,
-                "thread_id": job.thread_id
+                "thread_id": job.thread_id,
+                # Backend URLs are internal; they stay in the admin-only /api/traces and the logs
+                "trace": {k: v for k, v in summary.items() if k != "backend"}
             })
             
             room.current_job = None
     
-    except Exception as e:
-        print(f"Worker {worker_id} error: {e}")
+    except Exception:
+        log.exception("Worker failed")
     finally:
         room.worker_count -= 1
-        print(f"Worker {worker_id} stopped for room {room_id}")
+        log.info("Worker stopped")
+
+async def summarizer_loop(room_id: str):
+    """Fold cold turns into running summaries while the room is idle"""
+    bind(room_id=room_id)
+    log.info("Summarizer started")
+
+    while room_id in rooms:
+        await asyncio.sleep(1.0)
+        room = rooms.get(room_id)
+        if room is None or not room.is_idle():
+            continue
+
+        for thread_id, history in list(room.threads.items()):
+            summary = room.summaries.setdefault(thread_id, ThreadSummary())
+            turns = cold_turns(history, summary, CONTEXT_WINDOW)
+            if len(turns) < SUMMARY_MIN_TURNS:
+                continue
+
+            if OLLAMA_BASE_URL in residency:
+                residency[OLLAMA_BASE_URL].touch(SUMMARY_MODEL)
+            try:
+                text = await summarize(turns, summary.text, SUMMARY_MODEL, OLLAMA_BASE_URL)
+            except Exception as e:
+                log.warning("Summarizer failed: %s", e, extra={"thread_id": thread_id})
+                break
+
+            if text:
+                summary.text = text
+                summary.covered_until = turns[-1]["timestamp"]
+                summary.turns_summarized += len(turns)
+            break  # One thread per pass so new jobs are never kept waiting long
+
+    log.info("Summarizer stopped")
+
+async def presence_loop(room_id: str):
+    """Broadcast coalesced typing presence at a fixed rate, whatever the typing volume"""
+    while room_id in rooms:
+        await asyncio.sleep(PRESENCE_INTERVAL)
+        room = rooms.get(room_id)
+        frame = room.presence_frame() if room else None
+        if frame:
+            await broadcast_to_room(room_id, frame)
+
+def open_room(room_id: str) -> RoomState:
+    """Get or create local room state, starting workers if this process owns the room"""
+    room = rooms.get(room_id)
+    if room is None:
+        room = rooms[room_id] = RoomState(room_id)
+    
+    if bus.owns(room_id) and not room.tasks:
+        room.tasks = [asyncio.create_task(worker_loop(room_id, i)) for i in range(MAX_WORKERS)]
+        room.tasks.append(asyncio.create_task(presence_loop(room_id)))
+        if SUMMARIZE:
+            room.tasks.append(asyncio.create_task(summarizer_loop(room_id)))
+    
+    return room
+
+async def dispatch(room: RoomState, command: dict):
+    """Run a user command here if we own the room, else forward it to the owner"""
+    if bus.owns(room.room_id):
+        await handle_command(room, command)
+    else:
+        bus.send_to_owner(room.room_id, command)
+
+def warm_on_typing(room: RoomState, thread_id: str):
+    """Load the model while a user types, so their job doesn't pay load_duration"""
+    now = time.time()
+    if not WARMUP_ON_TYPING or not room.is_idle() or now - room.last_warmup < WARMUP_INTERVAL:
+        return
+    
+    manager = residency[router.preferred(thread_id)]
+    if not manager.is_resident(DEFAULT_MODEL):
+        room.last_warmup = now
+        manager.warm(DEFAULT_MODEL, speculative=True)
+
+async def handle_command(room: RoomState, command: dict):
+    """Apply a user command to a room owned by this process"""
+    room_id = room.room_id
+    kind = command["kind"]
+    user_id = command["user_id"]
+    
+    if kind == "join":
+        if user_id not in room.users:
+            room.add_user(UserInfo(
+                user_id=user_id,
+                nickname=command["nickname"],
+                websocket=None,
+                joined_at=time.time(),
+                thread_id=command["thread_id"]
+            ))
+        
+        # Broadcast user joined to others
+        await broadcast_to_room(room_id, {
+            "type": "user_joined",
+            "user_id": user_id,
+            "nickname": command["nickname"]
+        }, exclude_user=user_id)
+    
+    elif kind == "leave":
+        room.remove_user(user_id)
+        # Broadcast user left
+        await broadcast_to_room(room_id, {
+            "type": "user_left",
+            "user_id": user_id
+        })
+    
+    elif user_id not in room.users:
+        return
+    
+    elif kind == "history":
+        # Always the requester's own thread, whatever the frame asked for
+        page = await room.history_page(room.users[user_id].thread_id, command["before"], command["limit"])
+        await send_to_user(room_id, user_id, {"type": "history", **page})
+    
+    elif kind == "message":
+        if draining:
+            await send_to_user(room_id, user_id, {
+                "type": "error",
+                "message": "The server is restarting. Please send your message again in a moment."
+            })
+            return
+        
+        thread_id = command["thread_id"]
+        content = command["content"]
+        
+        # Add user message to thread history
+        user_message = {
+            "role": "user",
+            "content": content,
+            "timestamp": time.time()
+        }
+        room.append_message(thread_id, user_message)
+        room.set_typing(user_id, thread_id, False)
+        
+        # Prepare messages for Ollama (running summary + recent context)
+        messages = room.build_messages(thread_id)
+        
+        # Create job
+        job = Job(
+            job_id=str(uuid.uuid4()),
+            room_id=room_id,
+            thread_id=thread_id,
+            user_id=user_id,
+            messages=messages,
+            enqueued_at=time.time()
+        )
+        
+        # Enqueue job
+        position = room.enqueue_job(job)
+        eta = room.estimate_eta(position)
+        log.debug("Enqueued job", extra={"room_id": room_id, "job_id": job.job_id, "user_id": user_id,
+                                         "position": position, "eta": eta})
+        
+        # Notify user of queue position
+        await send_to_user(room_id, user_id, {
+            "type": "enqueued",
+            "job_id": job.job_id,
+            "position": position,
+            "eta_seconds": eta
+        })
+        
+        # Broadcast to room
+        await broadcast_to_room(room_id, {
+            "type": "message_added",
+            "user_id": user_id,
+            "thread_id": thread_id,
+            "content": content,
+            "nickname": room.users[user_id].nickname
+        })
+    
+    elif kind == "typing":
+        if command["is_typing"]:
+            warm_on_typing(room, command["thread_id"])
+        
+        # Picked up by presence_loop; nothing is broadcast per event
+        room.set_typing(user_id, command["thread_id"], command["is_typing"])
+
+async def on_bus_event(room_id: str, event: dict):
+    """Handle an event another process sent over the room bus"""
+    kind = event["kind"]
+    
+    if kind == "broadcast":
+        await deliver_local(room_id, event["message"], event.get("exclude_user"))
+    elif kind == "direct":
+        await send_local(room_id, event["user_id"], event["message"])
+    elif bus.owns(room_id):
+        room = open_room(room_id)
+        if kind in ("room_claimed", "room_handoff"):
+            for member in event["members"]:
+                if member["user_id"] not in room.users:
+                    room.add_user(UserInfo(
+                        user_id=member["user_id"],
+                        nickname=member["nickname"],
+                        websocket=None,
+                        joined_at=time.time(),
+                        thread_id=member["thread_id"]
+                    ))
+            # The previous owner kept appending to the shared history log
+            room.history_log.reload()
+        if kind == "room_handoff":
+            # Jobs the previous owner queued but never started; their users are connected elsewhere
+            for queued in event["queued"]:
+                if queued["user_id"] in room.users:
+                    room.enqueue_job(Job(**queued))
+            log.info("Took over room with %d queued jobs", len(event["queued"]), extra={"room_id": room_id})
+        elif kind in ("join", "leave", "message", "typing", "history"):
+            await handle_command(room, event)
+        elif kind in ("read_history", "read_memory"):
+            bus.reply(room_id, event, await answer_read(room, event))
+
+# Set once SIGTERM arrives: no new jobs are admitted or dispatched
+draining = False
+
+def job_record(job: Job) -> dict:
+    """Job fields that can cross the bus or go to disk (the trace stays behind)"""
+    return {k: v for k, v in vars(job).items() if k != "trace"}
+
+def save_drained_jobs(jobs: List[Job]):
+    """Append queued jobs nobody could take over, for recovery or inspection"""
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    with open(os.path.join(HISTORY_DIR, DRAINED_JOBS_FILE), "a") as f:
+        for job in jobs:
+            f.write(json.dumps({**job_record(job), "drained_at": time.time()}) + "\n")
+
+async def drain(timeout: float = DRAIN_TIMEOUT) -> dict:
+    """Stop admitting jobs, let running generations finish, then hand off or save queued ones"""
+    global draining
+    draining = True
+    await bus.mark_draining()
+    log.info("Draining: %d generations running, %d jobs queued",
+             sum(1 for r in rooms.values() if r.current_job), sum(len(r.pending_jobs) for r in rooms.values()))
+    
+    deadline = time.monotonic() + timeout
+    while any(room.current_job for room in rooms.values()) and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    
+    handed_off, dropped = 0, []
+    for room in list(rooms.values()):
+        jobs, room.pending_jobs = list(room.pending_jobs), deque()
+        # Users on other processes stay connected, so their jobs can move with the room
+        remote = [j for j in jobs if j.user_id in room.users and room.users[j.user_id].websocket is None]
+        if remote and bus.owns(room.room_id) and await bus.hand_off(room.room_id, [job_record(j) for j in remote]):
+            handed_off += len(remote)
+            jobs = [j for j in jobs if j not in remote]
+        dropped.extend(jobs)
+    
+    if dropped:
+        await asyncio.to_thread(save_drained_jobs, dropped)
+    for job in dropped:
+        await send_to_user(job.room_id, job.user_id, {
+            "type": "error",
+            "message": "The server restarted before your message was answered. Please send it again."
+        })
+    
+    result = {
+        "cut_off": sum(1 for r in rooms.values() if r.current_job),
+        "handed_off": handed_off,
+        "saved": len(dropped)
+    }
+    log.info("Drained: %d generations cut off, %d jobs handed off, %d saved to %s",
+             result["cut_off"], handed_off, len(dropped), DRAINED_JOBS_FILE)
+    return result
+
+@app.on_event("startup")
+async def build_static_assets():
+    """Build fingerprinted assets and point the room page at them"""
+    global room_template
+    if not STATIC_PIPELINE:
+        return
+    
+    try:
+        manifest = await asyncio.to_thread(static_pipeline.build)
+    except OSError as e:
+        log.warning("Static pipeline failed, serving plain assets: %s", e)
+        return
+    
+    if room_template is not None:
+        room_template = static_pipeline.rewrite_urls(room_template, manifest)
+        room_pages.clear()
+
+@app.on_event("startup")
+async def install_drain_handler():
+    """Drain on SIGTERM before the server starts closing sockets; a second SIGTERM exits at once"""
+    if DRAIN_TIMEOUT <= 0 or threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    previous = signal.getsignal(signal.SIGTERM)
+    
+    def exit_as_before(sig: int):
+        if callable(previous):
+            previous(sig, None)
+        else:
+            signal.signal(sig, previous)
+            signal.raise_signal(sig)
+    
+    async def drain_then_exit(sig: int):
+        try:
+            await drain()
+        finally:
+            exit_as_before(sig)
+    
+    def start_drain(sig: int):
+        # The signal can land mid-request; start clean so drain logs don't carry that request's fields
+        app.state.drain_task = contextvars.Context().run(loop.create_task, drain_then_exit(sig))
+    
+    def on_sigterm(sig, frame):
+        if draining:
+            exit_as_before(sig)
+        else:
+            loop.call_soon_threadsafe(start_drain, sig)
+    
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    """Watch for callbacks that block the event loop"""
+    if LOOP_MONITOR:
+        loop_monitor.start()
+
+@app.on_event("startup")
+async def start_tunnel_status():
+    """Start polling ngrok in the background"""
+    tunnel.start()
+
+@app.on_event("startup")
+async def warm_models():
+    """Load the chat (and summary) model on every backend before the first job"""
+    models = {DEFAULT_MODEL, SUMMARY_MODEL} if SUMMARIZE else {DEFAULT_MODEL}
+    for manager in residency.values():
+        manager.start(sorted(models))
+
+@app.on_event("startup")
+async def start_bus():
+    """Connect to the room bus"""
+    await bus.start(on_bus_event)
+
+@app.on_event("shutdown")
+async def stop_bus():
+    """Leave the room bus, handing owned rooms to other processes"""
+    await bus.stop()
+
+@app.on_event("shutdown")
+async def close_history_logs():
+    """Write out queued spills and close every room's history log"""
+    await asyncio.gather(*(asyncio.wrap_future(room.history_log.close()) for room in rooms.values()))
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    """Stop the lag probe and watchdog"""
+    loop_monitor.stop()
+
+def require_admin(request: Request):
+    """Guard for endpoints that expose room IDs, transcripts or backend URLs: same token as /admin"""
+    if not check_token(token_from_headers(request.headers)):
+        raise HTTPException(status_code=403, detail="Admin token required")
 
 # Routes
 @app.get("/")
@@ -429,30 +1090,31 @@ async def landing_page():
 async def create_room():
     """Create a new room"""
     room_id = generate_room_id()
-    rooms[room_id] = RoomState(room_id)
+    await bus.create_room(room_id)
     
-    # Start workers for this room
-    for i in range(MAX_WORKERS):
-        asyncio.create_task(worker_loop(room_id, i))
+    # Start workers for this room if it landed on this process
+    open_room(room_id)
     
     return {"room_id": room_id}
 
 @app.get("/room/{room_id}")
-async def room_page(room_id: str):
+async def room_page(room_id: str, request: Request):
     """Serve collaborative room page"""
-    if room_id not in rooms:
+    if room_id not in rooms and not await bus.room_exists(room_id):
         raise HTTPException(status_code=404, detail="Room not found")
     
-    # Read the collaborative.html file and inject the room ID
-    try:
-        with open('static/collaborative.html', 'r') as f:
-            html_content = f.read()
+    if room_template is not None:
+        # Inject the room ID into the cached template
+        page = room_pages.get(room_id)
+        if page is None:
+            page = room_pages[room_id] = StaticPage(
+                room_template.replace(ROOM_ID_PLACEHOLDER, f"window.ROOM_ID = '{room_id}';"))
         
-        # Replace the placeholder with the actual room ID
-        html_content = html_content.replace('window.ROOM_ID = \'loading...\';', f'window.ROOM_ID = \'{room_id}\';')
-        
-        return HTMLResponse(html_content)
-    except FileNotFoundError:
+        headers = {"ETag": page.etag, "Cache-Control": ROOM_PAGE_CACHE_CONTROL}
+        if is_not_modified(request.headers.get("if-none-match"), page.etag):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(page.body, headers=headers)
+    else:
         # Fallback to inline HTML if file not found
         return HTMLResponse("""
         <!DOCTYPE html>
@@ -594,33 +1256,58 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str):
     """WebSocket endpoint for room communication"""
     await websocket.accept()
     
-    if room_id not in rooms:
+    if room_id not in rooms and not await bus.room_exists(room_id):
         await websocket.close(code=1000, reason="Room not found")
         return
     
-    room = rooms[room_id]
+    room = open_room(room_id)
     user_id = None
+    limiter = ConnectionLimiter()
+    bind(room_id=room_id)
     
     try:
         while True:
             data = await websocket.receive_text()
-            print(f"WebSocket received data: {data}")
+            log.debug("Frame received: %.200s", data)
+            
+            # Size and flood checks before spending time on parsing
+            if limiter.check_frame(data):
+                if limiter.exhausted():
+                    shed.record_close()
+                    await websocket.close(code=1008, reason="Too many rejected messages")
+                    break
+                continue
             
             try:
                 message = json.loads(data)
-                print(f"WebSocket parsed message: {message}")
             except json.JSONDecodeError as e:
-                print(f"WebSocket JSON decode error: {e}")
+                log.debug("Invalid JSON frame: %s", e)
+                continue
+            
+            if not isinstance(message, dict) or not isinstance(message.get("type"), str):
+                log.debug("Invalid message format")
                 continue
             
-            if not isinstance(message, dict) or "type" not in message:
-                print(f"WebSocket invalid message format: {message}")
+            content = message.get("content") if message["type"] == "message" else None
+            content = content.strip() if isinstance(content, str) else ""
+            rejected = limiter.check_message(message["type"], len(content))
+            if rejected:
+                if limiter.exhausted():
+                    shed.record_close()
+                    await websocket.close(code=1008, reason="Too many rejected messages")
+                    break
+                if message["type"] == "message":
+                    reason = "Message too long" if rejected == "content_too_large" else "Slow down"
+                    await websocket.send_text(json.dumps({"type": "error", "message": reason}))
                 continue
             
             if message["type"] == "join":
+                if user_id:
+                    continue  # One user per connection
+                
                 # User joining room
                 nickname = message.get("nickname") or ""
-                nickname = nickname.strip() if nickname else ""
+                nickname = nickname.strip()[:MAX_NICKNAME_CHARS] if isinstance(nickname, str) else ""
                 if not nickname:
                     nickname = f"@{generate_user_id()}"
                 elif not nickname.startswith("@"):
@@ -628,6 +1315,7 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str):
                 
                 user_id = str(uuid.uuid4())
                 thread_id = str(uuid.uuid4())
+                bind(user_id=user_id)
                 
                 user_info = UserInfo(
                     user_id=user_id,
@@ -648,123 +1336,180 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str):
                     "room_id": room_id
                 }))
                 
-                # Broadcast user joined to others
-                await broadcast_to_room(room_id, {
-                    "type": "user_joined",
+                await bus.join(room_id, user_id, nickname, thread_id)
+                await dispatch(room, {
+                    "kind": "join",
                     "user_id": user_id,
-                    "nickname": nickname
-                }, exclude_user=user_id)
+                    "nickname": nickname,
+                    "thread_id": thread_id
+                })
                 
             elif message["type"] == "message" and user_id:
-                # User sending message
-                content = message.get("content") or ""
-                content = content.strip() if content else ""
+                # User sending message to their own thread
                 if not content:
                     continue
                 
-                thread_id = message.get("thread_id", room.users[user_id].thread_id)
-                
-                # Add user message to thread history
-                if thread_id not in room.threads:
-                    room.threads[thread_id] = []
-                
-                user_message = {
-                    "role": "user",
-                    "content": content,
-                    "timestamp": time.time()
-                }
-                room.threads[thread_id].append(user_message)
-                
-                # Prepare messages for Ollama (include recent context)
-                messages = room.threads[thread_id][-20:]  # Last 20 messages
-                
-                # Create job
-                job = Job(
-                    job_id=str(uuid.uuid4()),
-                    room_id=room_id,
-                    thread_id=thread_id,
-                    user_id=user_id,
-                    messages=messages,
-                    enqueued_at=time.time()
-                )
-                
-                # Enqueue job
-                position = room.enqueue_job(job)
-                eta = room.estimate_eta(position)
-                print(f"Enqueued job for user {user_id}, position {position}, eta {eta}s")
-                
-                # Notify user of queue position
-                await websocket.send_text(json.dumps({
-                    "type": "enqueued",
-                    "job_id": job.job_id,
-                    "position": position,
-                    "eta_seconds": eta
-                }))
-                
-                # Broadcast to room
-                await broadcast_to_room(room_id, {
-                    "type": "message_added",
+                thread_id = room.users[user_id].thread_id
+                await dispatch(room, {
+                    "kind": "message",
                     "user_id": user_id,
                     "thread_id": thread_id,
-                    "content": content,
-                    "nickname": room.users[user_id].nickname
+                    "content": content
                 })
             
             elif message["type"] == "typing" and user_id:
                 # Typing indicator
-                is_typing = message.get("is_typing", False)
-                thread_id = message.get("thread_id", room.users[user_id].thread_id)
-                
-                await broadcast_to_room(room_id, {
-                    "type": "typing",
+                is_typing = message.get("is_typing") is True
+                thread_id = room.users[user_id].thread_id
+                await dispatch(room, {
+                    "kind": "typing",
                     "user_id": user_id,
                     "thread_id": thread_id,
-                    "is_typing": is_typing,
-                    "nickname": room.users[user_id].nickname
-                }, exclude_user=user_id)
+                    "is_typing": is_typing
+                })
+            
+            elif message["type"] == "history" and user_id:
+                # Scroll-back is tied to the connection: a user can only page their own thread
+                before = message.get("before")
+                limit = message.get("limit")
+                await dispatch(room, {
+                    "kind": "history",
+                    "user_id": user_id,
+                    "before": before if isinstance(before, int) and not isinstance(before, bool) else None,
+                    "limit": max(1, min(limit, 200)) if isinstance(limit, int) else HISTORY_PAGE_SIZE
+                })
     
     except WebSocketDisconnect:
-        print(f"WebSocket disconnected for user {user_id}")
-        pass
-    except Exception as e:
-        print(f"WebSocket error for user {user_id}: {e}")
-        import traceback
-        traceback.print_exc()
+        log.info("WebSocket disconnected")
+    except Exception:
+        log.exception("WebSocket error")
     finally:
         if user_id and room_id in rooms:
             room.remove_user(user_id)
-            # Broadcast user left
-            await broadcast_to_room(room_id, {
-                "type": "user_left",
+            await bus.leave(room_id, user_id)
+            await dispatch(room, {
+                "kind": "leave",
                 "user_id": user_id
             })
 
+async def answer_read(room: RoomState, request: dict) -> dict:
+    """Serve a read_history/read_memory request for a room this process owns"""
+    if request["kind"] == "read_history":
+        return await room.history_page(request["thread_id"], request["before"], request["limit"])
+    return room.memory_stats()
+
+async def read_from_owner(room_id: str, request: dict) -> dict:
+    """Only the owner has the room's in-memory tail and an up-to-date log index"""
+    if room_id in rooms and bus.owns(room_id):
+        return await answer_read(rooms[room_id], request)
+    if not bus.distributed or bus.owns(room_id) or not await bus.room_exists(room_id):
+        raise HTTPException(status_code=404, detail="Room not found")
+    
+    result = await bus.ask_owner(room_id, request)
+    if result is None:
+        raise HTTPException(status_code=504, detail="Room owner did not answer")
+    return result
+
+@app.get("/api/rooms/{room_id}/threads/{thread_id}/history", dependencies=[Depends(require_admin)])
+async def thread_history(room_id: str, thread_id: str, before: Optional[int] = None, limit: int = HISTORY_PAGE_SIZE):
+    """Page backwards through any thread's history, including spilled messages (operators only)"""
+    return await read_from_owner(room_id, {
+        "kind": "read_history",
+        "thread_id": thread_id,
+        "before": before,
+        "limit": max(1, min(limit, 200))
+    })
+
+@app.get("/api/rooms/{room_id}/memory", dependencies=[Depends(require_admin)])
+async def room_memory(room_id: str):
+    """Report in-memory vs spilled history for a room"""
+    return await read_from_owner(room_id, {"kind": "read_memory"})
+
+@app.get("/api/response-cache")
+async def response_cache_stats():
+    """Report response cache hits and size"""
+    return response_cache.snapshot()
+
+@app.get("/api/traces", dependencies=[Depends(require_admin)])
+async def job_traces(room_id: Optional[str] = None, limit: int = 50, slowest: bool = False):
+    """Recent (or slowest) job traces with lifecycle phases and Ollama timings"""
+    return traces.query(room_id, max(1, min(limit, 500)), slowest)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(registry.render(), headers={"Content-Type": CONTENT_TYPE})
+
+@app.get("/api/loop")
+async def loop_lag():
+    """Report event loop lag percentiles and recent stalls with their stacks"""
+    return loop_monitor.snapshot()
+
+@app.get("/api/ws-limits")
+async def ws_limits():
+    """Report frames shed by WebSocket rate and size limits"""
+    return shed.snapshot()
+
+@app.get("/api/backends")
+async def backends():
+    """Report backend load and prompt cache savings"""
+    return router.snapshot()
+
+@app.get("/api/models/residency")
+async def model_residency():
+    """Report loaded models and cold-start counts per backend"""
+    return {url: manager.snapshot() for url, manager in residency.items()}
+
+@app.get("/api/threads/{thread_id}/metrics")
+async def thread_metrics(thread_id: str):
+    """Report backend affinity and prompt_eval_count savings for a thread"""
+    thread_stats = router.thread_stats(thread_id)
+    if thread_stats is None:
+        raise HTTPException(status_code=404, detail="No metrics for thread")
+    
+    return thread_stats
+
 @app.get("/ngrok-status")
 async def ngrok_status():
-    """Check if ngrok is active (keep compatibility)"""
-    try:
-        import requests
-        response = requests.get('http://localhost:4040/api/tunnels', timeout=1)
-        if response.status_code == 200:
-            data = response.json()
-            return {"ngrok_active": len(data.get('tunnels', [])) > 0}
-    except:
-        pass
-    return {"ngrok_active": False}
+    """Report cached ngrok status (polled in the background, never blocks the loop)"""
+    return tunnel.snapshot()
+
+@app.get("/static/dist/{filename}")
+async def static_asset(filename: str, request: Request):
+    """Serve a fingerprinted asset, precompressed to match Accept-Encoding"""
+    variant = static_pipeline.select_variant(
+        static_pipeline.DIST_DIR, filename, request.headers.get("accept-encoding", ""))
+    if variant is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    
+    path, encoding = variant
+    headers = {"Cache-Control": static_pipeline.IMMUTABLE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(path, media_type=static_pipeline.media_type(filename), headers=headers)
+
+def memory_report() -> dict:
+    """Objects held per room and by process-wide buffers, for /admin/memory"""
+    return {
+        "rooms": {
+            room_id: Breakdown(
+                threads=room.threads, summaries=room.summaries, pending_jobs=room.pending_jobs,
+                current_job=room.current_job, users=room.users, typing=room.typing,
+                history_index=dict(room.history_log.index), page=room_pages.get(room_id))
+            for room_id, room in list(rooms.items())
+        },
+        "shared": {"response_cache": response_cache, "traces": traces, "loop_monitor": loop_monitor,
+                   "room_pages": room_pages}
+    }
+
+# Profiling endpoints, only when an admin token is configured
+if ADMIN_TOKEN:
+    app.include_router(fastapi_router(AdminTools(memory_report)))
 
 # Serve static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 if __name__ == "__main__":
-    print("=" * 60)
-    print("Gummy Collaborative - Multi-User AI Chat Platform")
-    print("=" * 60)
-    
-    local_ip = get_local_ip()
-    print(f"🌐 Server starting on:")
-    print(f"   Local:   http://localhost:5006")
-    print(f"   Network: http://{local_ip}:5006")
-    print(f"   Workers: {MAX_WORKERS}")
-    print("=" * 60)
-    
-    uvicorn.run(app, host="0.0.0.0", port=5006, log_level="info")
+    # Same as `python3 serve.py`: uvloop if installed, tuned WebSockets, draining on SIGTERM
+    import serve
+    raise SystemExit(serve.main())
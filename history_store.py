@@ -0,0 +1,144 @@
+"""
+Gummy History Store - Append-only on-disk log for cold thread history
+Older messages spill here from memory; scroll-back reads page through an mmap.
+All file work runs in order on one background thread so it never blocks the event loop
+"""
+
+import asyncio
+import json
+import mmap
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from structured_log import get_logger
+
+log = get_logger("history")
+
+MESSAGE_OVERHEAD = 240  # Approximate bytes for the dict, keys and timestamp
+
+# One worker keeps every log's writes, reads and index rebuilds in submission order
+_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-io")
+
+def message_size(message: dict) -> int:
+    """Estimate the in-memory size of a message in bytes"""
+    return len(message.get("content", "")) + MESSAGE_OVERHEAD
+
+class RoomHistoryLog:
+    """Append-only JSON-lines log holding spilled messages for one room
+
+    append() and close() only queue work on the history thread. Anything that reads the
+    index or the file (count, read) must run there too, through run(), so it sees every
+    append queued before it.
+    """
+
+    def __init__(self, directory: str, room_id: str):
+        self.path = os.path.join(directory, f"{room_id}.log")
+        self.index: Dict[str, List[Tuple[int, int]]] = {}  # thread_id -> [(offset, length)]
+        self.size = 0
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+
+        self._submit(self._catch_up)
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        future = _io.submit(fn, *args)
+        future.add_done_callback(self._report)
+        return future
+
+    def _report(self, future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            log.warning("History log %s: %s", self.path, future.exception())
+
+    async def run(self, fn: Callable, *args):
+        """Run fn on the history thread after everything already queued for it"""
+        return await asyncio.wrap_future(_io.submit(fn, *args))
+
+    def _catch_up(self):
+        """Index lines past the end we know about: the whole file when a room opens, or what
+        another process appended while it owned the room"""
+        if not os.path.exists(self.path):
+            return
+        offset = self.size
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Another process is mid-write; pick the rest up next time
+                try:
+                    thread_id = json.loads(line)["thread_id"]
+                except (ValueError, KeyError):
+                    offset += len(line)
+                    continue
+                self.index.setdefault(thread_id, []).append((offset, len(line)))
+                offset += len(line)
+        self.size = offset
+
+    def reload(self):
+        """Pick up appends made by the room's previous owner (call when taking a room over)"""
+        self._submit(self._catch_up)
+
+    def count(self, thread_id: str) -> int:
+        """Number of spilled messages for a thread (history thread only)"""
+        return len(self.index.get(thread_id, []))
+
+    def spilled(self) -> int:
+        """Spilled messages across threads; safe from any thread, may trail queued appends"""
+        return sum(len(entries) for entries in list(self.index.values()))
+
+    def append(self, thread_id: str, messages: List[dict]):
+        """Queue messages for a thread to be appended to the end of the log"""
+        if messages:
+            self._submit(self._append, thread_id, messages)
+
+    def _append(self, thread_id: str, messages: List[dict]):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "ab")
+        # Offsets must match the real end of the file, even if another process wrote to it
+        self._catch_up()
+
+        entries = self.index.setdefault(thread_id, [])
+        for message in messages:
+            line = json.dumps({"thread_id": thread_id, **message}).encode("utf-8") + b"\n"
+            self._file.write(line)
+            entries.append((self.size, len(line)))
+            self.size += len(line)
+        self._file.flush()
+
+    def read(self, thread_id: str, start: int, stop: int) -> List[dict]:
+        """Read spilled messages [start, stop) for a thread (history thread only)"""
+        entries = self.index.get(thread_id, [])[start:stop]
+        if not entries:
+            return []
+
+        view = self._view()
+        messages = []
+        for offset, length in entries:
+            message = json.loads(view[offset:offset + length])
+            message.pop("thread_id", None)
+            messages.append(message)
+        return messages
+
+    def _view(self) -> mmap.mmap:
+        """Map the log read-only, remapping when it has grown"""
+        if self._map is None or self._mapped_size != self.size:
+            if self._map is not None:
+                self._map.close()
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = self.size
+        return self._map
+
+    def close(self) -> Future:
+        """Close the file handle and mapping once queued appends are written"""
+        return self._submit(self._close)
+
+    def _close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
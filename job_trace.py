@@ -0,0 +1,74 @@
+"""
+Gummy Job Trace - Where the time went for one generation job
+Lifecycle marks (enqueued, dispatched, first byte, first broadcast, done) merged with
+Ollama's own timings, kept in a rolling buffer for the traces API
+"""
+
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+TRACE_BUFFER = int(os.environ.get("TRACE_BUFFER", "500"))  # Finished traces kept in memory
+
+# Lifecycle marks in order, and the phase that ends at each one
+PHASES = (
+    ("dispatched", "queue"),
+    ("first_byte", "ollama_first_byte"),
+    ("first_chunk_sent", "first_broadcast"),
+    ("done", "stream")
+)
+OLLAMA_TIMINGS = ("load_duration", "prompt_eval_duration", "eval_duration", "total_duration")
+
+class JobTrace:
+    """Timestamps for one job; the first mark of each name wins"""
+
+    def __init__(self, enqueued_at: Optional[float] = None):
+        self.marks: Dict[str, float] = {"enqueued": enqueued_at or time.time()}
+        self.ollama: Dict[str, int] = {}
+        self.info: Dict[str, object] = {}
+
+    def mark(self, name: str):
+        if name not in self.marks:
+            self.marks[name] = time.time()
+
+    def merge_ollama(self, stats: dict):
+        """Take Ollama's durations (ns) and token counts from the final chunk"""
+        self.ollama = {k: v for k, v in stats.items() if k in OLLAMA_TIMINGS or k.endswith("_count")}
+
+    def to_dict(self) -> dict:
+        start = self.marks["enqueued"]
+        phases, previous = {}, start
+        for mark, phase in PHASES:
+            if mark in self.marks:
+                phases[phase] = round(1000 * (self.marks[mark] - previous), 1)
+                previous = self.marks[mark]
+
+        return {
+            **self.info,
+            "enqueued_at": start,
+            "total_ms": round(1000 * (self.marks.get("done", previous) - start), 1),
+            "marks_ms": {name: round(1000 * (at - start), 1) for name, at in self.marks.items()},
+            "phases_ms": phases,
+            "ollama_ms": {k[:-len("_duration")]: round(v / 1e6, 1)
+                          for k, v in self.ollama.items() if k.endswith("_duration")},
+            "tokens": {k[:-len("_count")]: v for k, v in self.ollama.items() if k.endswith("_count")}
+        }
+
+class TraceBuffer:
+    """Rolling buffer of finished traces"""
+
+    def __init__(self, size: int = TRACE_BUFFER):
+        self.traces: deque = deque(maxlen=size)
+
+    def add(self, trace: dict):
+        self.traces.append(trace)
+
+    def query(self, room_id: Optional[str] = None, limit: int = 50, slowest: bool = False) -> List[dict]:
+        """Most recent (or slowest) traces, optionally for one room"""
+        found = [t for t in self.traces if room_id is None or t.get("room_id") == room_id]
+        if slowest:
+            found.sort(key=lambda t: t["total_ms"], reverse=True)
+        else:
+            found.reverse()
+        return found[:limit]
@@ -0,0 +1,123 @@
+"""
+Gummy Loop Monitor - Event loop lag and blocked-loop watchdog
+A probe task measures how late the loop wakes it; a watchdog thread grabs the loop
+thread's stack while it is stuck, so a stall is logged with the code that caused it
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+
+from metrics import Counter, Gauge, Histogram, Registry
+from structured_log import get_logger
+
+# Configuration
+LOOP_MONITOR = os.environ.get("LOOP_MONITOR", "1") == "1"
+SLOW_CALLBACK = float(os.environ.get("LOOP_SLOW_CALLBACK_MS", "100")) / 1000  # Lag that counts as a stall
+LAG_INTERVAL = 0.1  # Seconds between probes
+LAG_WINDOW = 600  # Recent lag samples kept for percentiles (one minute at LAG_INTERVAL)
+MAX_STALLS = 50  # Recent stalls kept with their stacks
+STACK_LIMIT = 25  # Innermost frames captured per stall
+
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUANTILES = (0.5, 0.9, 0.99)
+
+log = get_logger("loop")
+
+def _quantile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+class LoopMonitor:
+    """Lag samples, stall count and recent stall stacks for one event loop"""
+
+    def __init__(self, interval: float = LAG_INTERVAL, threshold: float = SLOW_CALLBACK, window: int = LAG_WINDOW):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag: deque = deque(maxlen=window)
+        self.stalls: deque = deque(maxlen=MAX_STALLS)
+        self.heartbeat = 0.0  # Monotonic time the probe last ran
+        self.lag_histogram = Histogram("gummy_event_loop_lag_seconds", "How late the loop ran a timer", LAG_BUCKETS)
+        self.stall_counter = Counter("gummy_event_loop_stalls_total", "Loop stalls longer than the slow-callback threshold")
+        self._captured = None  # (heartbeat, stack) taken by the watchdog during a stall
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def register(self, registry: Registry):
+        """Add lag metrics to a registry"""
+        registry.register(self.lag_histogram)
+        registry.register(self.stall_counter)
+        registry.register(Gauge("gummy_event_loop_lag_recent_seconds", "Loop lag quantiles over the last minute",
+                                lambda: {(str(q),): v for q, v in self.quantiles().items()}, ["quantile"]))
+
+    def start(self):
+        """Start the probe on the running loop and the watchdog thread"""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._stop.set()
+
+    async def _probe(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            previous, self.heartbeat = self.heartbeat, now
+            lag = max(0.0, now - expected)
+            self.lag.append(lag)
+            self.lag_histogram.observe(lag)
+            if lag >= self.threshold:
+                self._record_stall(lag, previous)
+
+    def _watch(self):
+        """Capture the loop thread's stack once per stall, while it is still blocked"""
+        while not self._stop.wait(self.threshold / 2):
+            beat = self.heartbeat
+            if time.monotonic() - beat < self.interval + self.threshold:
+                continue
+            if self._captured is not None and self._captured[0] == beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self._captured = (beat, "".join(traceback.format_stack(frame, limit=STACK_LIMIT)))
+
+    def _record_stall(self, lag: float, previous_beat: float):
+        captured, self._captured = self._captured, None
+        stack = captured[1] if captured and captured[0] == previous_beat else None
+        self.stall_counter.inc()
+        self.stalls.append({"at": time.time(), "lag_ms": round(lag * 1000, 1), "stack": stack})
+        log.warning("Event loop blocked for %.0f ms%s", lag * 1000,
+                    f", stack while blocked:\n{stack}" if stack else " (too short for a stack)")
+
+    def quantiles(self) -> Dict[float, float]:
+        ordered = sorted(self.lag)
+        return {q: _quantile(ordered, q) for q in QUANTILES}
+
+    def snapshot(self) -> dict:
+        """Lag percentiles and recent stalls with stacks"""
+        ordered = sorted(self.lag)
+        lag_ms = {f"p{int(q * 100)}": round(_quantile(ordered, q) * 1000, 2) for q in QUANTILES}
+        lag_ms["max"] = round((ordered[-1] if ordered else 0.0) * 1000, 2)
+        return {
+            "running": self._task is not None,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "samples": len(ordered),
+            "lag_ms": lag_ms,
+            "stalls": int(self.stall_counter.values[()]),
+            "recent_stalls": list(self.stalls)[::-1]
+        }
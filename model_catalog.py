@@ -0,0 +1,111 @@
+"""
+Gummy Model Catalog - Cached view of the models Ollama has installed
+Refreshes /api/tags and /api/show in the background so requests never wait on Ollama
+"""
+
+import threading
+import time
+from typing import Dict, List
+
+from ollama_client import OllamaClient
+
+# Name fragments that pick a model for each mode, in order of preference
+MODE_KEYWORDS = {
+    "coder": ("coder", "code"),
+    "conversation": ("llama", "mistral")
+}
+
+class ModelCatalog:
+    """Background-refreshed model list with precomputed mode -> model mapping"""
+
+    def __init__(self, client: OllamaClient, defaults: Dict[str, str], ttl: float = 30.0):
+        self.client = client
+        self.defaults = defaults
+        self.ttl = ttl
+        self.refreshed_at = 0.0
+        self.available = False
+
+        # Replaced wholesale on refresh, so readers never see a half-built catalog
+        self._models: List[str] = []
+        self._metadata: Dict[str, dict] = {}
+        self._modes: Dict[str, str] = dict(defaults)
+
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the refresh thread once"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._refresh_loop, name="model-catalog", daemon=True)
+                self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            self.refresh()
+            time.sleep(self.ttl)
+
+    def refresh(self):
+        """Fetch installed models and metadata for any we haven't seen"""
+        try:
+            response = self.client.get("/api/tags", timeout=(self.client.timeout[0], 5))
+            response.raise_for_status()
+            tags = response.json().get("models", [])
+        except Exception as e:
+            print(f"Model catalog refresh failed: {e}")
+            self.available = False
+            return
+
+        models = [tag["name"] for tag in tags]
+        metadata = {}
+        for tag in tags:
+            name = tag["name"]
+            cached = self._metadata.get(name, {})
+            info = dict(cached) if "details" in cached else self._show(name)
+            info.update({"size": tag.get("size"), "modified_at": tag.get("modified_at")})
+            metadata[name] = info
+
+        self._models = models
+        self._metadata = metadata
+        self._modes = self._map_modes(models)
+        self.refreshed_at = time.time()
+        self.available = True
+
+    def _show(self, name: str) -> dict:
+        """Fetch model details from /api/show"""
+        try:
+            response = self.client.post("/api/show", json={"model": name}, timeout=(self.client.timeout[0], 10))
+            response.raise_for_status()
+            data = response.json()
+            return {"details": data.get("details", {}), "capabilities": data.get("capabilities", [])}
+        except Exception:
+            return {}
+
+    def _map_modes(self, models: List[str]) -> Dict[str, str]:
+        """Pick a model per mode: keyword match, else first installed, else default"""
+        modes = {}
+        for mode, default in self.defaults.items():
+            keywords = MODE_KEYWORDS.get(mode, ())
+            match = next((m for m in models if any(k in m.lower() for k in keywords)), None)
+            modes[mode] = match or (models[0] if models else default)
+        return modes
+
+    def models(self) -> List[str]:
+        """Installed model names from the last refresh"""
+        self.start()
+        return self._models
+
+    def model_for_mode(self, mode: str) -> str:
+        """Model to use for a mode, without touching Ollama"""
+        self.start()
+        return self._modes.get(mode) or self.defaults.get(mode) or next(iter(self.defaults.values()))
+
+    def snapshot(self) -> dict:
+        """Catalog contents for the /models endpoint"""
+        self.start()
+        return {
+            "available": self.available,
+            "refreshed_at": self.refreshed_at,
+            "modes": self._modes,
+            "models": self._metadata
+        }
@@ -0,0 +1,159 @@
+"""
+Gummy Model Residency - Keep the models people use loaded in Ollama
+Warms models ahead of use, pings keep_alive while there is traffic, unloads idle
+models and counts cold starts
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Set
+
+from ollama_client import OllamaClient
+
+# Configuration
+KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "10m")  # How long Ollama keeps a warmed model
+PING_INTERVAL = 60.0  # Seconds between residency checks
+RECENT_WINDOW = 900.0  # Models used this recently get keep_alive pings
+IDLE_UNLOAD = float(os.environ.get("MODEL_IDLE_UNLOAD", "1800"))  # Unload after this long unused
+COLD_LOAD_SECONDS = 0.5  # A load_duration above this counts as a cold start
+LOAD_TIMEOUT = 300  # Seconds allowed for Ollama to load a model
+
+class ModelResidency:
+    """Background manager for which models Ollama keeps in memory"""
+
+    def __init__(self, client: OllamaClient, keep_alive: str = KEEP_ALIVE,
+                 ping_interval: float = PING_INTERVAL, idle_unload: float = IDLE_UNLOAD):
+        self.client = client
+        self.keep_alive = keep_alive
+        self.ping_interval = ping_interval
+        self.idle_unload = idle_unload
+
+        self.resident: Set[str] = set()
+        self.last_used: Dict[str, float] = {}
+        self.requests = Counter()
+        self.cold_starts = Counter()
+        self.warmups = Counter()
+        self.speculative = Counter()  # Warmups started on a hint, before any request
+        self.unloads = Counter()
+
+        self._pending: Set[str] = set()
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self, models: Iterable[str] = ()):
+        """Start the manager thread once and warm the given models"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="model-residency", daemon=True)
+                self._thread.start()
+        for model in models:
+            self.warm(model)
+
+    def warm(self, model: str, speculative: bool = False):
+        """Ask for a model to be loaded; returns immediately"""
+        self.start()
+        with self._lock:
+            if model in self._pending:
+                return
+            self._pending.add(model)
+            if speculative:
+                self.speculative[model] += 1
+        self._queue.put(model)
+
+    def touch(self, model: str):
+        """Note that a request is using a model"""
+        with self._lock:
+            self.last_used[model] = time.time()
+            self.requests[model] += 1
+
+    def record_load(self, model: str, load_duration_ns: int):
+        """Record Ollama's load_duration for a request to spot cold starts"""
+        if load_duration_ns / 1e9 > COLD_LOAD_SECONDS:
+            with self._lock:
+                self.cold_starts[model] += 1
+        self.resident.add(model)
+
+    def is_resident(self, model: str) -> bool:
+        """Whether the model was loaded at the last check"""
+        return model in self.resident
+
+    def _run(self):
+        next_check = 0.0
+        while True:
+            try:
+                model = self._queue.get(timeout=max(0.0, next_check - time.time()))
+                self._load(model, self.keep_alive)
+                with self._lock:
+                    self._pending.discard(model)
+                    self.warmups[model] += 1
+                    self.last_used.setdefault(model, time.time())
+                continue
+            except queue.Empty:
+                pass
+
+            self._check()
+            next_check = time.time() + self.ping_interval
+
+    def _load(self, model: str, keep_alive):
+        """Load (or unload, with keep_alive 0) a model without generating anything"""
+        try:
+            response = self.client.post(
+                "/api/generate",
+                json={"model": model, "keep_alive": keep_alive},
+                timeout=(self.client.timeout[0], LOAD_TIMEOUT)
+            )
+            if response.status_code == 200:
+                if keep_alive == 0:
+                    self.resident.discard(model)
+                else:
+                    self.resident.add(model)
+        except Exception as e:
+            print(f"Model residency: loading {model} failed: {e}")
+
+    def _check(self):
+        """Refresh what's loaded, keep recent models warm and unload idle ones"""
+        try:
+            response = self.client.get("/api/ps", timeout=(self.client.timeout[0], 5))
+            if response.status_code == 200:
+                self.resident = {m["name"] for m in response.json().get("models", [])}
+        except Exception:
+            return
+
+        now = time.time()
+        for model in list(self.resident):
+            if model not in self.last_used:
+                continue  # Loaded by someone else; not ours to manage
+            idle = now - self.last_used[model]
+            if idle < RECENT_WINDOW:
+                self._load(model, self.keep_alive)
+            elif idle > self.idle_unload:
+                self._load(model, 0)
+                with self._lock:
+                    self.unloads[model] += 1
+
+    def snapshot(self) -> dict:
+        """Residency, traffic and cold-start counts per model"""
+        now = time.time()
+        with self._lock:
+            models = set(self.requests) | set(self.warmups) | self.resident
+            return {
+                "keep_alive": self.keep_alive,
+                "models": {
+                    model: {
+                        "resident": model in self.resident,
+                        "requests": self.requests[model],
+                        "cold_starts": self.cold_starts[model],
+                        "cold_start_rate": round(self.cold_starts[model] / self.requests[model], 3)
+                        if self.requests[model] else 0.0,
+                        "warmups": self.warmups[model],
+                        "speculative_warmups": self.speculative[model],
+                        "unloads": self.unloads[model],
+                        "idle_seconds": round(now - self.last_used[model], 1) if model in self.last_used else None
+                    }
+                    for model in sorted(models)
+                }
+            }
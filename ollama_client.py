@@ -0,0 +1,127 @@
+"""
+Gummy Ollama Client - Shared pooled HTTP client for the Flask apps
+Keep-alive connection pool, separate connect/read timeouts, bounded retries with jitter
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configuration
+CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.environ.get("OLLAMA_READ_TIMEOUT", "120"))
+MAX_RETRIES = 2  # Extra attempts after a connection error
+BACKOFF_BASE = 0.25  # Seconds; doubled per attempt with full jitter
+POOL_SIZE = 16  # Keep-alive connections held open to Ollama
+
+# Sampling options sent with every generation, e.g. OLLAMA_OPTIONS='{"temperature": 0}'
+GENERATION_OPTIONS = json.loads(os.environ.get("OLLAMA_OPTIONS") or "{}")
+
+class LatencyStats:
+    """Rolling latency and error counts for one endpoint"""
+
+    def __init__(self, window: int = 256):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: deque = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(1000 * self.total / self.count, 1) if self.count else 0.0,
+            "p50_ms": round(1000 * self.percentile(0.50), 1),
+            "p99_ms": round(1000 * self.percentile(0.99), 1),
+            "max_ms": round(1000 * self.max, 1)
+        }
+
+class OllamaClient:
+    """Thread-safe Ollama client built on one pooled requests.Session"""
+
+    def __init__(self, base_url: str, connect_timeout: float = CONNECT_TIMEOUT,
+                 read_timeout: float = READ_TIMEOUT, max_retries: int = MAX_RETRIES,
+                 pool_size: int = POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._stats: Dict[str, LatencyStats] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, method: str, path: str) -> LatencyStats:
+        key = f"{method} {path}"
+        with self._lock:
+            if key not in self._stats:
+                self._stats[key] = LatencyStats()
+            return self._stats[key]
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send a request, retrying connection errors with jittered backoff.
+
+        Latency is measured to response headers, so streamed bodies count
+        time-to-first-byte rather than the whole generation.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        stats = self._endpoint(method, path)
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+            except requests.exceptions.ConnectionError:
+                with self._lock:
+                    stats.errors += 1
+                    if attempt >= self.max_retries:
+                        raise
+                    stats.retries += 1
+                time.sleep(random.uniform(0, BACKOFF_BASE * (2 ** attempt)))
+                attempt += 1
+                continue
+            except requests.exceptions.RequestException:
+                with self._lock:
+                    stats.errors += 1
+                raise
+
+            with self._lock:
+                stats.record(time.perf_counter() - start)
+            return response
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def metrics(self) -> dict:
+        """Per-endpoint call counts, errors, retries and latency percentiles"""
+        with self._lock:
+            return {key: stats.snapshot() for key, stats in self._stats.items()}
@@ -0,0 +1,61 @@
+"""
+Gummy Page Cache - Pages built once and revalidated with ETags
+Shared by the Flask apps (compiled Jinja templates) and the collaborative server
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag for a response body"""
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+def is_not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+class StaticPage:
+    """Encoded body and ETag for a page that doesn't change per request"""
+
+    def __init__(self, body: str):
+        self.body = body.encode("utf-8")
+        self.etag = etag_for(self.body)
+
+class PageRenderer:
+    """Jinja template compiled once, with rendered pages cached per context"""
+
+    def __init__(self, app, source: str, max_entries: int = 64):
+        self.template = app.jinja_env.from_string(source)
+        self.max_entries = max_entries
+        self._pages: "OrderedDict[tuple, StaticPage]" = OrderedDict()
+
+    def page(self, **context) -> StaticPage:
+        """Render the template for a context, reusing earlier renders"""
+        key = tuple(sorted(context.items()))
+        page = self._pages.get(key)
+        if page is None:
+            page = StaticPage(self.template.render(**context))
+            self._pages[key] = page
+            if len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+        return page
+
+    def response(self, **context):
+        """Flask response with ETag; answers 304 when the browser's copy is current"""
+        from flask import make_response, request
+
+        page = self.page(**context)
+        if is_not_modified(request.headers.get("If-None-Match"), page.etag):
+            response = make_response("", 304)
+        else:
+            response = make_response(page.body)
+            response.mimetype = "text/html"
+        response.headers["ETag"] = page.etag
+        # Pages vary with the session cookie, so browsers may cache but must revalidate
+        response.headers["Cache-Control"] = "private, no-cache"
+        response.headers["Vary"] = "Cookie"
+        return response
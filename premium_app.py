@@ -3,19 +3,32 @@
 Ollama Web Host - Polished Version with Premium Styling
 """
 
+import os
 import socket
 import requests
 import json
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 import webbrowser
 from threading import Timer
 
+from model_residency import ModelResidency
+from ollama_client import GENERATION_OPTIONS, OllamaClient
+from page_cache import PageRenderer
+from profiling import ADMIN_TOKEN, AdminTools, flask_blueprint
+from response_cache import replay_chunks, response_cache
+import session_state
+from tunnel_status import tunnel
+
 app = Flask(__name__)
+session_state.init_sessions(app)
 
 # Configuration
-OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+ollama = OllamaClient(OLLAMA_BASE_URL)  # Shared keep-alive connection pool
 current_model = "gemma3:4b"
 current_mode = "conversation"
+usage = session_state.ModelUsage()
+residency = ModelResidency(ollama)  # Keeps the session models loaded between requests
 
 # Premium HTML Template with Glass Design
 HTML_TEMPLATE = """
@@ -495,7 +508,9 @@ HTML_TEMPLATE = """
     <script>
         console.log('CUIDADO loaded');
         
-        let currentMode = 'conversation';
+        let currentMode = '{{ current_mode }}';
+        document.getElementById('conversation-btn').classList.toggle('active', currentMode === 'conversation');
+        document.getElementById('coder-btn').classList.toggle('active', currentMode === 'coder');
         
         // Mode buttons
         document.getElementById('conversation-btn').addEventListener('click', function() {
@@ -528,14 +543,25 @@ HTML_TEMPLATE = """
         
         function setMode(mode) {
             console.log('Setting mode to:', mode);
-            currentMode = mode;
-            
-            // Update button styles
-            document.getElementById('conversation-btn').classList.toggle('active', mode === 'conversation');
-            document.getElementById('coder-btn').classList.toggle('active', mode === 'coder');
             
-            // Add system message
-            addMessage('assistant', `Switched to ${mode} mode`);
+            // Mode is kept per session on the server
+            fetch('/set_mode', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ mode: mode })
+            })
+            .then(response => response.json())
+            .then(data => {
+                currentMode = data.mode;
+                
+                // Update button styles
+                document.getElementById('conversation-btn').classList.toggle('active', currentMode === 'conversation');
+                document.getElementById('coder-btn').classList.toggle('active', currentMode === 'coder');
+                
+                // Add system message
+                addMessage('assistant', `Switched to ${currentMode} mode`);
+            })
+            .catch(error => console.error('Error setting mode:', error));
         }
         
         function sendMessage() {
@@ -557,22 +583,8 @@ HTML_TEMPLATE = """
             sendBtn.classList.add('loading');
             addLoadingIndicator();
             
-            // Send to server
-            fetch('/chat', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ message: message })
-            })
-            .then(response => response.json())
-            .then(data => {
-                removeLoadingIndicator();
-                
-                if (data.response) {
-                    addMessage('assistant', data.response);
-                } else if (data.error) {
-                    addMessage('assistant', '❌ Error: ' + data.error);
-                }
-            })
+            // Stream the reply as Server-Sent Events
+            streamChat(message)
             .catch(error => {
                 removeLoadingIndicator();
                 console.error('Error:', error);
@@ -585,6 +597,59 @@ HTML_TEMPLATE = """
             });
         }
         
+        async function streamChat(message) {
+            const response = await fetch('/chat/stream', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ message: message })
+            });
+            
+            if (!response.ok || !response.body) {
+                const data = await response.json();
+                removeLoadingIndicator();
+                addMessage('assistant', '❌ Error: ' + (data.error || response.status));
+                return;
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let text = '';
+            let contentDiv = null;
+            
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                
+                // Each SSE event ends with a blank line
+                const events = buffer.split('\\n\\n');
+                buffer = events.pop();
+                
+                for (const event of events) {
+                    if (!event.startsWith('data: ')) continue;
+                    const data = JSON.parse(event.slice(6));
+                    
+                    if (data.delta) {
+                        if (!contentDiv) {
+                            removeLoadingIndicator();
+                            contentDiv = addMessage('assistant', '');
+                        }
+                        text += data.delta;
+                        renderContent(contentDiv, text);
+                    } else if (data.error) {
+                        removeLoadingIndicator();
+                        addMessage('assistant', '❌ Error: ' + data.error);
+                    }
+                }
+            }
+            
+            removeLoadingIndicator();
+            if (!contentDiv && !text) {
+                addMessage('assistant', 'No response from model');
+            }
+        }
+        
         function addMessage(sender, content) {
             const chatContainer = document.getElementById('chat-container');
             const messageDiv = document.createElement('div');
@@ -592,7 +657,16 @@ HTML_TEMPLATE = """
             
             const contentDiv = document.createElement('div');
             contentDiv.className = 'message-content';
+            renderContent(contentDiv, content);
+            
+            messageDiv.appendChild(contentDiv);
+            chatContainer.appendChild(messageDiv);
             
+            chatContainer.scrollTop = chatContainer.scrollHeight;
+            return contentDiv;
+        }
+        
+        function renderContent(contentDiv, content) {
             // Format code blocks
             const formattedContent = content.replace(/```([^`]+)```/g, (match, code) => {
                 return `<pre><code>${escapeHtml(code.trim())}</code></pre>`;
@@ -600,9 +674,7 @@ HTML_TEMPLATE = """
             
             contentDiv.innerHTML = formattedContent.replace(/\\n/g, '<br>');
             
-            messageDiv.appendChild(contentDiv);
-            chatContainer.appendChild(messageDiv);
-            
+            const chatContainer = document.getElementById('chat-container');
             chatContainer.scrollTop = chatContainer.scrollHeight;
         }
         
@@ -662,6 +734,18 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# Compiled once; rendered pages are cached per session mode/model
+pages = PageRenderer(app, HTML_TEMPLATE)
+
+def memory_report():
+    """Objects held by the app's caches, for /admin/memory"""
+    return {"caches": {"response_cache": response_cache, "pages": pages, "usage": usage,
+                       "residency": residency}}
+
+# Profiling endpoints, only when an admin token is configured
+if ADMIN_TOKEN:
+    app.register_blueprint(flask_blueprint(AdminTools(memory_report)))
+
 def get_local_ip():
     """Get the local IP address"""
     try:
@@ -676,7 +760,7 @@ def get_local_ip():
 @app.route('/')
 def home():
     """Render the main chat interface"""
-    return render_template_string(HTML_TEMPLATE, current_model=current_model)
+    return pages.response(current_model=current_model, current_mode=session_state.get_mode(current_mode))
 
 @app.route('/send-arrow.svg')
 def send_arrow():
@@ -696,17 +780,50 @@ def logo():
     from flask import send_file
     return send_file('cuidado-logo.png', mimetype='image/png')
 
+@app.route('/set_mode', methods=['POST'])
+def set_mode():
+    """Switch between coder and conversation modes for this session"""
+    data = request.get_json()
+    mode = 'coder' if data.get('mode') == 'coder' else 'conversation'
+    session_state.set_mode(mode)
+    residency.warm(current_model)
+    
+    return jsonify({'success': True, 'mode': mode})
+
 @app.route('/ngrok-status')
 def ngrok_status():
-    """Check if ngrok is active"""
-    try:
-        response = requests.get('http://localhost:4040/api/tunnels', timeout=1)
-        if response.status_code == 200:
-            data = response.json()
-            return jsonify({'ngrok_active': len(data.get('tunnels', [])) > 0})
-    except:
-        pass
-    return jsonify({'ngrok_active': False})
+    """Report cached ngrok status (polled in the background)"""
+    return jsonify(tunnel.snapshot())
+
+def get_system_prompt(mode):
+    """Prepare system prompt based on mode"""
+    if mode == 'coder':
+        return "You are an expert programmer. Provide clear, concise code examples with explanations. Format code using markdown code blocks."
+    return "You are a helpful, friendly assistant. Provide clear and concise responses."
+
+def sse(payload):
+    """Format one Server-Sent Event"""
+    return f"data: {json.dumps(payload)}\n\n"
+
+@app.route('/model-usage')
+def model_usage():
+    """Report per-model request counters"""
+    return jsonify(usage.snapshot())
+
+@app.route('/model-residency')
+def model_residency():
+    """Report which models are loaded and how often requests hit a cold model"""
+    return jsonify(residency.snapshot())
+
+@app.route('/response-cache')
+def response_cache_stats():
+    """Report response cache hits and size"""
+    return jsonify(response_cache.snapshot())
+
+@app.route('/ollama-metrics')
+def ollama_metrics():
+    """Report Ollama call latency, errors and retries"""
+    return jsonify(ollama.metrics())
 
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -717,28 +834,36 @@ def chat():
     if not user_message:
         return jsonify({'error': 'No message provided'}), 400
     
-    # Prepare system prompt based on mode
-    system_prompt = ""
-    if current_mode == 'coder':
-        system_prompt = "You are an expert programmer. Provide clear, concise code examples with explanations. Format code using markdown code blocks."
-    else:
-        system_prompt = "You are a helpful, friendly assistant. Provide clear and concise responses."
+    model = current_model
+    system_prompt = get_system_prompt(session_state.get_mode(current_mode))
+    
+    # Deterministic prompts may already have an answer
+    cache_key = response_cache.key_for(model, system_prompt, [{"role": "user", "content": user_message}],
+                                       GENERATION_OPTIONS)
+    cached = response_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        return jsonify({'response': cached, 'cached': True})
     
     try:
         # Send request to Ollama
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json={
-                "model": current_model,
-                "prompt": user_message,
-                "system": system_prompt,
-                "stream": False
-            },
-            timeout=120
-        )
+        residency.touch(model)
+        with usage.track(model):
+            response = ollama.post(
+                "/api/generate",
+                json={
+                    "model": model,
+                    "prompt": user_message,
+                    "system": system_prompt,
+                    "options": GENERATION_OPTIONS,
+                    "stream": False
+                }
+            )
         
         if response.status_code == 200:
             result = response.json()
+            residency.record_load(model, result.get('load_duration', 0))
+            if cache_key and result.get('response'):
+                response_cache.put(cache_key, result['response'])
             return jsonify({'response': result.get('response', 'No response from model')})
         else:
             return jsonify({'error': f'Ollama error: {response.status_code}'}), 500
@@ -750,6 +875,72 @@ def chat():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Relay tokens from Ollama to the browser as Server-Sent Events"""
+    data = request.get_json()
+    user_message = data.get('message', '')
+    
+    if not user_message:
+        return jsonify({'error': 'No message provided'}), 400
+    
+    model = current_model
+    system_prompt = get_system_prompt(session_state.get_mode(current_mode))
+    
+    cache_key = response_cache.key_for(model, system_prompt, [{"role": "user", "content": user_message}],
+                                       GENERATION_OPTIONS)
+    
+    def generate():
+        # Replay a cached answer as if it were streaming
+        cached = response_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            for delta in replay_chunks(cached):
+                yield sse({'delta': delta})
+            yield sse({'done': True, 'cached': True})
+            return
+        
+        text = ''
+        residency.touch(model)
+        try:
+            with usage.track(model), ollama.post(
+                "/api/generate",
+                json={
+                    "model": model,
+                    "prompt": user_message,
+                    "system": system_prompt,
+                    "options": GENERATION_OPTIONS,
+                    "stream": True
+                },
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    yield sse({'error': f'Ollama error: {response.status_code}'})
+                    return
+                
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('response'):
+                        text += chunk['response']
+                        yield sse({'delta': chunk['response']})
+                    if chunk.get('done'):
+                        residency.record_load(model, chunk.get('load_duration', 0))
+                        if cache_key and text:
+                            response_cache.put(cache_key, text)
+                        break
+            yield sse({'done': True})
+        
+        except requests.exceptions.Timeout:
+            yield sse({'error': 'Request timeout. The model might be too large or slow.'})
+        except requests.exceptions.ConnectionError:
+            yield sse({'error': 'Cannot connect to Ollama. Make sure it is running.'})
+        except Exception as e:
+            yield sse({'error': str(e)})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == '__main__':
     print("=" * 60)
     print("CUIDADO - Premium AI Chat Interface")
@@ -761,6 +952,9 @@ if __name__ == '__main__':
     print(f"   Network: http://{local_ip}:5005")
     print("=" * 60)
     
+    tunnel.start()
+    residency.start([current_model])
+    
     # Open browser after a short delay
     Timer(1.5, lambda: webbrowser.open(f'http://{local_ip}:5005')).start()
     
@@ -0,0 +1,329 @@
+"""
+Gummy Profiling - On-demand profiling endpoints for a live server
+A sampling profiler (collapsed stacks for flamegraph.pl / speedscope), tracemalloc top
+allocations and a memory breakdown, behind ADMIN_TOKEN. Nothing is mounted or running
+unless ADMIN_TOKEN is set and a profile is asked for
+"""
+
+import collections
+import functools
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional
+
+# Configuration
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")  # Empty: admin endpoints are not mounted
+PROFILE_INTERVAL = 0.01  # Seconds between stack samples (100 Hz)
+PROFILE_MAX_SECONDS = 300  # Longest profiling window
+TRACEMALLOC_FRAMES = 10  # Frames kept per allocation traceback
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+class Breakdown(dict):
+    """Parts of one thing (e.g. a room) sized separately and totalled"""
+
+MemoryReport = Callable[[], Dict[str, Dict[str, object]]]  # section -> name -> object or Breakdown
+
+def check_token(supplied: Optional[str]) -> bool:
+    """Constant-time comparison against ADMIN_TOKEN"""
+    return bool(ADMIN_TOKEN) and hmac.compare_digest((supplied or "").encode(), ADMIN_TOKEN.encode())
+
+def token_from_headers(headers) -> Optional[str]:
+    """X-Admin-Token, or Authorization: Bearer <token>"""
+    token = headers.get("x-admin-token")
+    if token:
+        return token
+    auth = headers.get("authorization") or ""
+    return auth[7:] if auth.lower().startswith("bearer ") else None
+
+class SamplingProfiler:
+    """Samples every thread's stack from a background thread for a bounded window"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks: collections.Counter = collections.Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.deadline = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval: Optional[float] = None) -> dict:
+        """Start a new window, discarding the previous profile"""
+        with self._lock:
+            if self.running:
+                raise ValueError("A profile is already running")
+            self.interval = interval or self.interval
+            self.stacks = collections.Counter()
+            self.samples = 0
+            self.started_at = time.time()
+            self.deadline = time.monotonic() + min(seconds, PROFILE_MAX_SECONDS)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return self.status()
+
+    def stop(self) -> dict:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.status()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval) and time.monotonic() < self.deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self.stacks[self._collapse(names.get(ident, str(ident)), frame)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        """Root-to-leaf frames joined with ';', thread name as the root"""
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        frames.append(thread_name)
+        return ";".join(reversed(frames))
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format: one 'frame;frame;frame count' line per stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "stacks": len(self.stacks)
+        }
+
+@functools.lru_cache(maxsize=1024)
+def _short_path(filename: str) -> str:
+    """Repo-relative path, or package/module.py for everything else"""
+    if filename.startswith(ROOT + os.sep):
+        return filename[len(ROOT) + 1:]
+    return "/".join(filename.split(os.sep)[-2:])
+
+@functools.lru_cache(maxsize=None)
+def _is_local(cls: type) -> bool:
+    """Classes defined in this repo, whose attributes count towards their owner's size"""
+    module = sys.modules.get(cls.__module__)
+    path = getattr(module, "__file__", None) or ""
+    return os.path.dirname(os.path.abspath(path)) == ROOT if path else False
+
+def deep_size(obj: object, seen: Optional[set] = None) -> int:
+    """Bytes held by obj: builtin containers and this repo's objects are followed,
+    anything else (sockets, locks, library objects) counts only its own header"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj, 0)
+
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif _is_local(type(obj)) and hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    return size
+
+class AdminTools:
+    """Framework-neutral profiling operations; the router/blueprint below expose them"""
+
+    def __init__(self, memory_report: MemoryReport):
+        self.memory_report = memory_report
+        self.profiler = SamplingProfiler()
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+
+    def tracemalloc_start(self, frames: int = TRACEMALLOC_FRAMES) -> dict:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(1, min(frames, 50)))
+        self.baseline = tracemalloc.take_snapshot()
+        return self.tracemalloc_status()
+
+    def tracemalloc_stop(self) -> dict:
+        tracemalloc.stop()
+        self.baseline = None
+        return self.tracemalloc_status()
+
+    def tracemalloc_status(self) -> dict:
+        current, peak = tracemalloc.get_traced_memory()
+        return {"tracing": tracemalloc.is_tracing(), "traced_kb": current // 1024, "peak_kb": peak // 1024}
+
+    def tracemalloc_top(self, limit: int = 20, group: str = "lineno", diff: bool = False) -> dict:
+        """Largest allocation sites, or the biggest growth since tracemalloc_start"""
+        if not tracemalloc.is_tracing():
+            raise ValueError("tracemalloc is not running; POST /admin/tracemalloc/start first")
+        if group not in ("lineno", "traceback", "filename"):
+            raise ValueError("group must be lineno, traceback or filename")
+
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")
+        ])
+        if diff and self.baseline is not None:
+            stats = snapshot.compare_to(self.baseline, group)
+            top = [{"size_kb": round(s.size / 1024, 1), "size_diff_kb": round(s.size_diff / 1024, 1),
+                    "count": s.count, "count_diff": s.count_diff, "traceback": s.traceback.format()}
+                   for s in stats[:limit]]
+        else:
+            top = [{"size_kb": round(s.size / 1024, 1), "count": s.count, "traceback": s.traceback.format()}
+                   for s in snapshot.statistics(group)[:limit]]
+        return {**self.tracemalloc_status(), "group": group, "diff": diff, "top": top}
+
+    def memory_parts(self):
+        """(section, name, part, object) for everything the app reports; part is None for a
+        plain object, so callers can size one piece at a time"""
+        for section, items in self.memory_report().items():
+            for name, obj in items.items():
+                if isinstance(obj, Breakdown):
+                    for part, value in obj.items():
+                        yield section, name, part, value
+                else:
+                    yield section, name, None, obj
+
+    @staticmethod
+    def add_size(report: dict, section: str, name: str, part: Optional[str], size: int):
+        entries = report.setdefault(section, {})
+        if part is None:
+            entries[name] = size
+        else:
+            breakdown = entries.setdefault(name, {})
+            breakdown[part] = size
+            breakdown["total"] = breakdown.pop("total", 0) + size  # Kept as the last key
+
+    def memory(self) -> dict:
+        """Deep size in bytes of every object the app reports, by section"""
+        report = {}
+        for section, name, part, obj in self.memory_parts():
+            self.add_size(report, section, name, part, deep_size(obj))
+        return report
+
+def fastapi_router(tools: AdminTools):
+    """/admin routes for a FastAPI app, guarded by ADMIN_TOKEN"""
+    import asyncio
+    from fastapi import APIRouter, Depends, HTTPException, Request
+    from fastapi.responses import PlainTextResponse
+
+    def require_token(request: Request):
+        if not check_token(token_from_headers(request.headers)):
+            raise HTTPException(status_code=403, detail="Admin token required")
+
+    router = APIRouter(prefix="/admin", dependencies=[Depends(require_token)])
+
+    def run(fn, *args):
+        try:
+            return fn(*args)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+    @router.post("/profile/start")
+    async def profile_start(seconds: float = 30, interval_ms: Optional[float] = None):
+        """Start sampling every thread for a window (stops itself at the deadline)"""
+        return run(tools.profiler.start, seconds, interval_ms / 1000 if interval_ms else None)
+
+    @router.post("/profile/stop")
+    async def profile_stop():
+        """Stop sampling and return the collapsed stacks"""
+        tools.profiler.stop()
+        return PlainTextResponse(tools.profiler.collapsed())
+
+    @router.get("/profile")
+    async def profile():
+        """Collapsed stacks so far (flamegraph.pl, speedscope, inferno)"""
+        return PlainTextResponse(tools.profiler.collapsed(), headers={"X-Profile-Samples": str(tools.profiler.samples)})
+
+    @router.post("/tracemalloc/start")
+    async def tracemalloc_start(frames: int = TRACEMALLOC_FRAMES):
+        # Snapshots take a while with many traces; keep them off the event loop
+        return await asyncio.to_thread(tools.tracemalloc_start, frames)
+
+    @router.post("/tracemalloc/stop")
+    async def tracemalloc_stop():
+        return tools.tracemalloc_stop()
+
+    @router.get("/tracemalloc")
+    async def tracemalloc_top(limit: int = 20, group: str = "lineno", diff: bool = False):
+        """Top allocation sites, or growth since start with diff=true"""
+        return await asyncio.to_thread(run, tools.tracemalloc_top, max(1, min(limit, 200)), group, diff)
+
+    @router.get("/memory")
+    async def memory():
+        """Memory held per room and by shared caches"""
+        # Room state keeps changing on the loop, so walk it here, but yield after every piece
+        # so a big report doesn't stall token streams
+        report = {}
+        for section, name, part, obj in tools.memory_parts():
+            tools.add_size(report, section, name, part, deep_size(obj))
+            await asyncio.sleep(0)
+        return report
+
+    return router
+
+def flask_blueprint(tools: AdminTools):
+    """/admin routes for a Flask app, guarded by ADMIN_TOKEN"""
+    from flask import Blueprint, Response, jsonify, request
+
+    blueprint = Blueprint("admin", __name__, url_prefix="/admin")
+
+    @blueprint.before_request
+    def require_token():
+        if not check_token(token_from_headers(request.headers)):
+            return jsonify({"error": "Admin token required"}), 403
+
+    def run(fn, *args):
+        try:
+            return jsonify(fn(*args))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 409
+
+    @blueprint.route("/profile/start", methods=["POST"])
+    def profile_start():
+        interval_ms = request.args.get("interval_ms", type=float)
+        return run(tools.profiler.start, request.args.get("seconds", 30, type=float),
+                   interval_ms / 1000 if interval_ms else None)
+
+    @blueprint.route("/profile/stop", methods=["POST"])
+    def profile_stop():
+        tools.profiler.stop()
+        return Response(tools.profiler.collapsed(), mimetype="text/plain")
+
+    @blueprint.route("/profile")
+    def profile():
+        return Response(tools.profiler.collapsed(), mimetype="text/plain",
+                        headers={"X-Profile-Samples": str(tools.profiler.samples)})
+
+    @blueprint.route("/tracemalloc/start", methods=["POST"])
+    def tracemalloc_start():
+        return jsonify(tools.tracemalloc_start(request.args.get("frames", TRACEMALLOC_FRAMES, type=int)))
+
+    @blueprint.route("/tracemalloc/stop", methods=["POST"])
+    def tracemalloc_stop():
+        return jsonify(tools.tracemalloc_stop())
+
+    @blueprint.route("/tracemalloc")
+    def tracemalloc_top():
+        limit = max(1, min(request.args.get("limit", 20, type=int), 200))
+        diff = request.args.get("diff", "false").lower() in ("1", "true")
+        return run(tools.tracemalloc_top, limit, request.args.get("group", "lineno"), diff)
+
+    @blueprint.route("/memory")
+    def memory():
+        return jsonify(tools.memory())
+
+    return blueprint
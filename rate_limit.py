@@ -0,0 +1,109 @@
+"""
+Gummy Rate Limits - Inbound WebSocket limits per connection
+Token buckets per message type, frame and content size caps, and counters for shed load
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+# Configuration
+MAX_FRAME_BYTES = int(os.environ.get("WS_MAX_FRAME_BYTES", "16384"))  # Checked before parsing
+MAX_MESSAGE_CHARS = int(os.environ.get("MAX_MESSAGE_CHARS", "8000"))  # Chat message content
+MAX_NICKNAME_CHARS = 32
+FRAME_LIMIT = (20.0, 40)  # (frames per second, burst) per connection, any type
+RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "message": (0.5, 5),  # Chat messages become Ollama jobs
+    "typing": (4.0, 8),   # Clients send edges, plus a refresh every few seconds
+    "join": (0.1, 1)
+}
+DEFAULT_LIMIT = (2.0, 5)  # Any other message type
+MAX_VIOLATIONS = 100  # Close a connection after this many rejected frames
+
+class TokenBucket:
+    """Classic token bucket: refills at rate per second up to burst"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+class ShedCounters:
+    """Process-wide counts of rejected frames by reason and message type"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.bytes = 0
+        self.closed = 0
+        self._lock = threading.Lock()
+
+    def record(self, reason: str, kind: str = "frame", size: int = 0):
+        with self._lock:
+            self.counts[(reason, kind)] += 1
+            self.bytes += size
+
+    def record_close(self):
+        with self._lock:
+            self.closed += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "shed": [{"reason": r, "type": k, "count": n} for (r, k), n in sorted(self.counts.items())],
+                "shed_bytes": self.bytes,
+                "connections_closed": self.closed
+            }
+
+# Shared by every connection in the process
+shed = ShedCounters()
+
+class ConnectionLimiter:
+    """Limits for one WebSocket connection"""
+
+    def __init__(self):
+        self.frames = TokenBucket(*FRAME_LIMIT)
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.violations = 0
+
+    def _reject(self, reason: str, kind: str, size: int = 0) -> str:
+        self.violations += 1
+        shed.record(reason, kind, size)
+        return reason
+
+    def check_frame(self, data: str) -> Optional[str]:
+        """Cheap checks on the raw frame; returns a rejection reason or None"""
+        if len(data) > MAX_FRAME_BYTES:
+            return self._reject("frame_too_large", "frame", len(data))
+        if not self.frames.allow():
+            return self._reject("rate_limited", "frame", len(data))
+        return None
+
+    def check_message(self, kind: str, content_chars: int = 0) -> Optional[str]:
+        """Per-type rate and content size checks on a parsed message"""
+        # Client-chosen types share one bucket (and counter label) so they can't be rotated
+        kind = kind if kind in RATE_LIMITS else "default"
+        if content_chars > MAX_MESSAGE_CHARS:
+            return self._reject("content_too_large", kind, content_chars)
+
+        bucket = self.buckets.get(kind)
+        if bucket is None:
+            bucket = self.buckets[kind] = TokenBucket(*RATE_LIMITS.get(kind, DEFAULT_LIMIT))
+        if not bucket.allow():
+            return self._reject("rate_limited", kind)
+        return None
+
+    def exhausted(self) -> bool:
+        """Whether the client has misbehaved enough to be disconnected"""
+        return self.violations >= MAX_VIOLATIONS
@@ -0,0 +1,124 @@
+"""
+Gummy Response Cache - Exact-match cache for deterministic generations
+In-memory LRU with an optional on-disk tier; hits are replayed as a token stream
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+
+# Configuration (opt-in)
+RESPONSE_CACHE = os.environ.get("RESPONSE_CACHE", "0") == "1"
+RESPONSE_CACHE_DIR = os.environ.get("RESPONSE_CACHE_DIR", "")  # Empty: memory only
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "512"))
+REPLAY_CHUNK_CHARS = 16  # Characters per replayed chunk
+
+def is_deterministic(options: Optional[dict]) -> bool:
+    """Only greedy sampling gives the same answer for the same prompt"""
+    options = options or {}
+    return options.get("temperature") == 0 or options.get("top_k") == 1
+
+def replay_chunks(text: str, size: int = REPLAY_CHUNK_CHARS) -> Iterator[str]:
+    """Split a cached response into stream-sized chunks"""
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+class ResponseCache:
+    """Thread-safe LRU of responses with TTL and an optional directory tier"""
+
+    def __init__(self, enabled: bool = RESPONSE_CACHE, max_entries: int = RESPONSE_CACHE_SIZE,
+                 ttl: float = RESPONSE_CACHE_TTL, directory: str = RESPONSE_CACHE_DIR):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory or None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (response, created_at)
+        self._lock = threading.Lock()
+
+    def key_for(self, model: str, system: Optional[str], messages: List[dict],
+                options: Optional[dict]) -> Optional[str]:
+        """Cache key for a request, or None when the cache must not apply"""
+        if not self.enabled or not is_deterministic(options):
+            return None
+        payload = {
+            "model": model,
+            "system": system or "",
+            "messages": [{"role": m["role"], "content": m["content"]} for m in messages],
+            "options": options
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a response in memory, then on disk"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._entries.pop(key, None)
+
+        if self.directory:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                if now - stored["created_at"] < self.ttl:
+                    self._remember(key, stored["response"], stored["created_at"])
+                    with self._lock:
+                        self.hits += 1
+                        self.disk_hits += 1
+                    return stored["response"]
+                os.remove(self._path(key))
+            except (OSError, ValueError, KeyError):
+                pass
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, response: str):
+        """Store a completed response"""
+        created_at = time.time()
+        self._remember(key, response, created_at)
+
+        if self.directory:
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump({"response": response, "created_at": created_at}, f)
+                os.replace(path + ".tmp", path)
+            except OSError as e:
+                print(f"Response cache write failed: {e}")
+
+    def _remember(self, key: str, response: str, created_at: float):
+        with self._lock:
+            self._entries[key] = (response, created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses
+            }
+
+# Shared by every app in the process
+response_cache = ResponseCache()
@@ -0,0 +1,333 @@
+"""
+Gummy Room Bus - Share rooms across server processes
+Each room is owned by one process that runs its queue and workers; other processes
+forward room commands to the owner and relay its broadcasts to their own sockets.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from structured_log import get_logger
+
+log = get_logger("room_bus")
+
+# handler(room_id, event) runs for every event delivered to this process
+EventHandler = Callable[[str, dict], Awaitable[None]]
+
+class RoomBus:
+    """Single-process bus: this process owns every room and nothing crosses the bus"""
+
+    distributed = False
+
+    def __init__(self):
+        self.node_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.handler: Optional[EventHandler] = None
+
+    async def start(self, handler: EventHandler):
+        """Start delivering bus events to the handler"""
+        self.handler = handler
+
+    async def stop(self):
+        """Stop delivering events and release owned rooms"""
+        self.handler = None
+
+    def owns(self, room_id: str) -> bool:
+        """Check whether this process runs the room's queue and workers"""
+        return True
+
+    async def create_room(self, room_id: str):
+        """Register a new room and assign its owner"""
+
+    async def room_exists(self, room_id: str) -> bool:
+        """Check whether any process knows the room"""
+        return False
+
+    async def join(self, room_id: str, user_id: str, nickname: str, thread_id: str):
+        """Record that a user's socket lives on this process"""
+
+    async def leave(self, room_id: str, user_id: str):
+        """Forget a user's socket on this process"""
+
+    def publish(self, room_id: str, event: dict):
+        """Send an event to every other process"""
+
+    def send_to_owner(self, room_id: str, event: dict):
+        """Send a command to the process that owns the room"""
+
+    async def ask_owner(self, room_id: str, event: dict, timeout: float = 5.0) -> Optional[dict]:
+        """Send a request to the room's owner and wait for its reply; None if nobody answers"""
+        return None
+
+    def reply(self, room_id: str, request: dict, result: dict):
+        """Answer a request that arrived through ask_owner"""
+
+    async def mark_draining(self):
+        """Stop this process being picked as the owner of new, orphaned or handed-off rooms"""
+
+    async def hand_off(self, room_id: str, queued: List[dict]) -> bool:
+        """Give an owned room and its queued jobs to another live process; False if there is none"""
+        return False
+
+def _rendezvous(room_id: str, nodes: List[str]) -> str:
+    """Pick the owner for a room with highest-random-weight hashing"""
+    return max(nodes, key=lambda node: hashlib.blake2b(f"{room_id}:{node}".encode(), digest_size=8).digest())
+
+class SqliteRoomBus(RoomBus):
+    """Pub/sub over a shared SQLite file in WAL mode, for processes on one host"""
+
+    distributed = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS nodes (node_id TEXT PRIMARY KEY, heartbeat REAL, draining INTEGER DEFAULT 0);
+        CREATE TABLE IF NOT EXISTS rooms (room_id TEXT PRIMARY KEY, owner TEXT, created_at REAL);
+        CREATE TABLE IF NOT EXISTS members (
+            room_id TEXT, user_id TEXT, node_id TEXT, nickname TEXT, thread_id TEXT,
+            PRIMARY KEY (room_id, user_id));
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, room_id TEXT, target TEXT,
+            origin TEXT, payload TEXT, created_at REAL);
+        CREATE INDEX IF NOT EXISTS events_created ON events (created_at);
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.02, node_ttl: float = 5.0,
+                 event_ttl: float = 60.0):
+        super().__init__()
+        self.node_id = f"{self.node_id}-{uuid.uuid4().hex[:6]}"
+        self.path = path
+        self.poll_interval = poll_interval
+        self.node_ttl = node_ttl
+        self.event_ttl = event_ttl
+        self.owned: Set[str] = set()
+        self.outbox: List[tuple] = []
+        self.last_event_id = 0
+        self.replies: Dict[str, asyncio.Future] = {}  # request_id -> future awaiting the owner's reply
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        """Run one statement under the connection lock"""
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self._conn.commit()
+            return rows
+
+    def _claim(self, room_id: str, owner: Optional[str]) -> bool:
+        """Take over a room if its owner hasn't changed since we looked"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE rooms SET owner = ? WHERE room_id = ? AND owner IS ?", (self.node_id, room_id, owner))
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    async def _run(self, sql: str, params: tuple = ()) -> list:
+        """Run a statement off the event loop"""
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    def _open(self):
+        """Open the database and register this node"""
+        self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        try:
+            # Bus files created before nodes had a draining flag
+            self._conn.execute("ALTER TABLE nodes ADD COLUMN draining INTEGER DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass
+        self._conn.execute("INSERT OR REPLACE INTO nodes (node_id, heartbeat, draining) VALUES (?, ?, 0)",
+                           (self.node_id, time.time()))
+        row = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()
+        self.last_event_id = row[0]
+        self._conn.commit()
+
+    async def start(self, handler: EventHandler):
+        await super().start(handler)
+        await asyncio.to_thread(self._open)
+        self._tasks = [
+            asyncio.create_task(self._poll_loop()),
+            asyncio.create_task(self._heartbeat_loop())
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await self._flush()
+        # Hand owned rooms to the surviving processes
+        await self._run("DELETE FROM nodes WHERE node_id = ?", (self.node_id,))
+        await self._run("DELETE FROM members WHERE node_id = ?", (self.node_id,))
+        await self._run("UPDATE rooms SET owner = NULL WHERE owner = ?", (self.node_id,))
+        self.owned.clear()
+        await super().stop()
+
+    def owns(self, room_id: str) -> bool:
+        return room_id in self.owned
+
+    async def _live_nodes(self) -> List[str]:
+        """Nodes that can take on rooms: heartbeating and not draining"""
+        rows = await self._run("SELECT node_id FROM nodes WHERE heartbeat > ? AND NOT draining",
+                               (time.time() - self.node_ttl,))
+        return [r[0] for r in rows] or [self.node_id]
+
+    async def mark_draining(self):
+        await self._run("UPDATE nodes SET draining = 1 WHERE node_id = ?", (self.node_id,))
+
+    async def create_room(self, room_id: str):
+        owner = _rendezvous(room_id, await self._live_nodes())
+        await self._run("INSERT INTO rooms VALUES (?, ?, ?)", (room_id, owner, time.time()))
+        if owner == self.node_id:
+            self.owned.add(room_id)
+        else:
+            self._enqueue(room_id, owner, {"kind": "room_created"})
+
+    async def room_exists(self, room_id: str) -> bool:
+        return bool(await self._run("SELECT 1 FROM rooms WHERE room_id = ?", (room_id,)))
+
+    async def join(self, room_id: str, user_id: str, nickname: str, thread_id: str):
+        await self._run("INSERT OR REPLACE INTO members VALUES (?, ?, ?, ?, ?)",
+                        (room_id, user_id, self.node_id, nickname, thread_id))
+
+    async def leave(self, room_id: str, user_id: str):
+        await self._run("DELETE FROM members WHERE room_id = ? AND user_id = ?", (room_id, user_id))
+
+    def publish(self, room_id: str, event: dict):
+        self._enqueue(room_id, None, event)
+
+    def send_to_owner(self, room_id: str, event: dict):
+        self._enqueue(room_id, "owner", event)
+
+    async def ask_owner(self, room_id: str, event: dict, timeout: float = 5.0) -> Optional[dict]:
+        request_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self.replies[request_id] = future
+        self._enqueue(room_id, "owner", {**event, "reply_to": self.node_id, "request_id": request_id})
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.replies.pop(request_id, None)
+
+    def reply(self, room_id: str, request: dict, result: dict):
+        self._enqueue(room_id, request["reply_to"],
+                      {"kind": "reply", "request_id": request["request_id"], "result": result})
+
+    async def hand_off(self, room_id: str, queued: List[dict]) -> bool:
+        others = [node for node in await self._live_nodes() if node != self.node_id]
+        if not others or room_id not in self.owned:
+            return False
+        successor = _rendezvous(room_id, others)
+        members = await self._run(
+            "SELECT user_id, nickname, thread_id FROM members WHERE room_id = ? AND node_id != ?",
+            (room_id, self.node_id))
+        await self._run("UPDATE rooms SET owner = ? WHERE room_id = ? AND owner = ?",
+                        (successor, room_id, self.node_id))
+        self.owned.discard(room_id)
+        self._enqueue(room_id, successor, {
+            "kind": "room_handoff",
+            "members": [{"user_id": u, "nickname": n, "thread_id": t} for u, n, t in members],
+            "queued": queued
+        })
+        return True
+
+    def _enqueue(self, room_id: str, target: Optional[str], event: dict):
+        """Buffer an event; the poll loop writes the outbox in one transaction"""
+        self.outbox.append((room_id, target, self.node_id, json.dumps(event), time.time()))
+
+    def _write(self, batch: List[tuple]):
+        with self._lock:
+            resolved = []
+            for room_id, target, origin, payload, created_at in batch:
+                if target == "owner":
+                    row = self._conn.execute("SELECT owner FROM rooms WHERE room_id = ?", (room_id,)).fetchone()
+                    target = row[0] if row and row[0] else None
+                resolved.append((room_id, target, origin, payload, created_at))
+            self._conn.executemany(
+                "INSERT INTO events (room_id, target, origin, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                resolved)
+            self._conn.commit()
+
+    async def _flush(self):
+        if self.outbox:
+            batch, self.outbox = self.outbox, []
+            await asyncio.to_thread(self._write, batch)
+
+    async def _poll_loop(self):
+        """Flush the outbox and deliver new events addressed to this process"""
+        while True:
+            try:
+                await self._flush()
+                rows = await self._run(
+                    "SELECT id, room_id, payload FROM events WHERE id > ? AND origin != ? "
+                    "AND (target IS NULL OR target = ?) ORDER BY id",
+                    (self.last_event_id, self.node_id, self.node_id))
+                for event_id, room_id, payload in rows:
+                    self.last_event_id = event_id
+                    event = json.loads(payload)
+                    if event["kind"] == "reply":
+                        future = self.replies.get(event["request_id"])
+                        if future is not None and not future.done():
+                            future.set_result(event["result"])
+                        continue
+                    if event["kind"] in ("room_created", "room_handoff"):
+                        self.owned.add(room_id)
+                    if self.handler:
+                        await self.handler(room_id, event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Room bus poll error: %s", e)
+            await asyncio.sleep(self.poll_interval)
+
+    async def _heartbeat_loop(self):
+        """Keep this node alive, reap dead nodes and claim their rooms"""
+        while True:
+            try:
+                now = time.time()
+                await self._run("UPDATE nodes SET heartbeat = ? WHERE node_id = ?", (now, self.node_id))
+                await self._run("DELETE FROM events WHERE created_at < ?", (now - self.event_ttl,))
+
+                stale = now - self.node_ttl
+                for room_id, user_id in await self._run(
+                        "SELECT m.room_id, m.user_id FROM members m LEFT JOIN nodes n ON m.node_id = n.node_id "
+                        "WHERE n.heartbeat IS NULL OR n.heartbeat < ?", (stale,)):
+                    await self.leave(room_id, user_id)
+                    if self.owns(room_id) and self.handler:
+                        await self.handler(room_id, {"kind": "leave", "user_id": user_id})
+
+                live = await self._live_nodes()
+                for room_id, owner in await self._run(
+                        "SELECT r.room_id, r.owner FROM rooms r LEFT JOIN nodes n ON r.owner = n.node_id "
+                        "WHERE n.heartbeat IS NULL OR n.heartbeat < ?", (stale,)):
+                    if _rendezvous(room_id, live) != self.node_id:
+                        continue
+                    if await asyncio.to_thread(self._claim, room_id, owner):
+                        self.owned.add(room_id)
+                        members = await self._run(
+                            "SELECT user_id, nickname, thread_id FROM members WHERE room_id = ?", (room_id,))
+                        if self.handler:
+                            await self.handler(room_id, {
+                                "kind": "room_claimed",
+                                "members": [
+                                    {"user_id": u, "nickname": n, "thread_id": t} for u, n, t in members
+                                ]
+                            })
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Room bus heartbeat error: %s", e)
+            await asyncio.sleep(1.0)
+
+def create_bus(kind: str, path: str) -> RoomBus:
+    """Build the room bus named by configuration"""
+    if kind == "sqlite":
+        return SqliteRoomBus(path)
+    return RoomBus()
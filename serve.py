@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Gummy Serve - Production launcher for the collaborative server
+uvicorn with uvloop/httptools when installed, WebSocket settings tuned for many small
+frames, and SIGTERM draining (see collaborative_app.drain). Run: python3 serve.py --workers 4
+"""
+
+import argparse
+import importlib.util
+import os
+import socket
+import sys
+
+import uvicorn
+
+from rate_limit import MAX_FRAME_BYTES
+
+APP = "collaborative_app:app"
+DEFAULT_PORT = 5006
+WS_MAX_SIZE = 4 * MAX_FRAME_BYTES  # Protocol cap; frames up to this are dropped and counted by the app, not fatal
+WS_PING_INTERVAL = 20.0  # Seconds between keepalive pings (finds dead sockets behind NAT/proxies)
+WS_PING_TIMEOUT = 20.0
+BACKLOG = 2048  # Pending TCP connections, e.g. a whole class joining at once
+KEEP_ALIVE_TIMEOUT = 5  # Seconds an idle HTTP keep-alive connection stays open
+GRACEFUL_TIMEOUT = 10  # Seconds uvicorn waits for sockets to close after the app has drained
+
+def available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+def get_local_ip():
+    """Get the local IP address of the machine"""
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect(("8.8.8.8", 80))
+        ip = s.getsockname()[0]
+        s.close()
+        return ip
+    except OSError:
+        return "127.0.0.1"
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the Gummy collaborative server")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", DEFAULT_PORT)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", "1")),
+                        help="Server processes (more than one needs ROOM_BUS=sqlite)")
+    parser.add_argument("--drain-timeout", type=float, default=float(os.environ.get("DRAIN_TIMEOUT", "30")),
+                        help="Seconds SIGTERM waits for running generations (0 disables draining)")
+    parser.add_argument("--limit-concurrency", type=int, help="Refuse connections beyond this many per process")
+    parser.add_argument("--proxy-headers", action="store_true", help="Trust X-Forwarded-* from --forwarded-allow-ips")
+    parser.add_argument("--forwarded-allow-ips", default="127.0.0.1")
+    parser.add_argument("--log-level", default="info", choices=["critical", "error", "warning", "info", "debug"])
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.workers > 1 and os.environ.get("ROOM_BUS") == "local":
+        print("❌ ROOM_BUS=local keeps rooms inside one process; use ROOM_BUS=sqlite with --workers > 1",
+              file=sys.stderr)
+        return 2
+
+    # Workers import the app themselves, so settings they read go through the environment
+    os.environ["DRAIN_TIMEOUT"] = str(args.drain_timeout)
+    if args.workers > 1:
+        # A room created on one process must be reachable from pages and sockets on the others
+        os.environ.setdefault("ROOM_BUS", "sqlite")
+    loop = "uvloop" if available("uvloop") else "asyncio"
+    http = "httptools" if available("httptools") else "h11"
+
+    print("=" * 60)
+    print("Gummy Collaborative - Multi-User AI Chat Platform")
+    print("=" * 60)
+    print(f"🌐 Server starting on:")
+    print(f"   Local:   http://localhost:{args.port}")
+    print(f"   Network: http://{get_local_ip()}:{args.port}")
+    print(f"   Processes: {args.workers} ({loop} loop, {http} parser)")
+    print(f"   Room workers: {os.environ.get('WORKERS', '1')}")
+    print(f"   Room bus: {os.environ.get('ROOM_BUS', 'local')}")
+    print("=" * 60)
+
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        ws_max_size=WS_MAX_SIZE,
+        ws_ping_interval=WS_PING_INTERVAL,
+        ws_ping_timeout=WS_PING_TIMEOUT,
+        # Chunks are tiny JSON frames; per-message deflate costs CPU per frame and a zlib context per socket
+        ws_per_message_deflate=False,
+        backlog=BACKLOG,
+        timeout_keep_alive=KEEP_ALIVE_TIMEOUT,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        limit_concurrency=args.limit_concurrency,
+        proxy_headers=args.proxy_headers,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+        log_level=args.log_level
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Gummy Session State - Per-browser chat mode for the Flask apps
+Kept in Flask's signed session cookie so concurrent users never share one global
+"""
+
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import Flask, session
+
+def init_sessions(app: Flask):
+    """Configure the signed session cookie"""
+    # Set FLASK_SECRET_KEY to keep sessions valid across restarts
+    app.secret_key = os.environ.get("FLASK_SECRET_KEY") or os.urandom(32)
+    app.config.update(SESSION_COOKIE_HTTPONLY=True, SESSION_COOKIE_SAMESITE="Lax")
+
+def get_mode(default: str = "conversation") -> str:
+    """Chat mode chosen by this browser"""
+    return session.get("mode", default)
+
+def set_mode(mode: str):
+    """Remember this browser's mode; the model is resolved per request so it tracks what is installed"""
+    session["mode"] = mode
+
+class ModelUsage:
+    """Thread-safe per-model request counters"""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.in_flight = Counter()
+        self.errors = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, model: str):
+        """Count one request against a model for its duration"""
+        with self._lock:
+            self.requests[model] += 1
+            self.in_flight[model] += 1
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self.errors[model] += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight[model] -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                model: {
+                    "requests": self.requests[model],
+                    "in_flight": self.in_flight[model],
+                    "errors": self.errors[model]
+                }
+                for model in self.requests
+            }
@@ -3,17 +3,24 @@
 Simple Ollama Web Host - Working Version
 """
 
+import os
 import socket
 import requests
 import json
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, request, jsonify
 import webbrowser
 from threading import Timer
 
+from ollama_client import GENERATION_OPTIONS, OllamaClient
+from page_cache import PageRenderer
+from profiling import ADMIN_TOKEN, AdminTools, flask_blueprint
+from response_cache import response_cache
+
 app = Flask(__name__)
 
 # Configuration
-OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+ollama = OllamaClient(OLLAMA_BASE_URL)  # Shared keep-alive connection pool
 current_model = "gemma3:4b"
 current_mode = "conversation"
 
@@ -158,6 +165,17 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# Compiled once; rendered pages are cached per model
+pages = PageRenderer(app, HTML_TEMPLATE)
+
+def memory_report():
+    """Objects held by the app's caches, for /admin/memory"""
+    return {"caches": {"response_cache": response_cache, "pages": pages}}
+
+# Profiling endpoints, only when an admin token is configured
+if ADMIN_TOKEN:
+    app.register_blueprint(flask_blueprint(AdminTools(memory_report)))
+
 def get_local_ip():
     """Get the local IP address"""
     try:
@@ -172,7 +190,17 @@ def get_local_ip():
 @app.route('/')
 def home():
     """Render the main chat interface"""
-    return render_template_string(HTML_TEMPLATE, current_model=current_model)
+    return pages.response(current_model=current_model)
+
+@app.route('/response-cache')
+def response_cache_stats():
+    """Report response cache hits and size"""
+    return jsonify(response_cache.snapshot())
+
+@app.route('/ollama-metrics')
+def ollama_metrics():
+    """Report Ollama call latency, errors and retries"""
+    return jsonify(ollama.metrics())
 
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -190,21 +218,30 @@ def chat():
     else:
         system_prompt = "You are a helpful, friendly assistant. Provide clear and concise responses."
     
+    # Deterministic prompts may already have an answer
+    cache_key = response_cache.key_for(current_model, system_prompt, [{"role": "user", "content": user_message}],
+                                       GENERATION_OPTIONS)
+    cached = response_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        return jsonify({'response': cached, 'cached': True})
+    
     try:
         # Send request to Ollama
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
+        response = ollama.post(
+            "/api/generate",
             json={
                 "model": current_model,
                 "prompt": user_message,
                 "system": system_prompt,
+                "options": GENERATION_OPTIONS,
                 "stream": False
-            },
-            timeout=120
+            }
         )
         
         if response.status_code == 200:
             result = response.json()
+            if cache_key and result.get('response'):
+                response_cache.put(cache_key, result['response'])
             return jsonify({'response': result.get('response', 'No response from model')})
         else:
             return jsonify({'error': f'Ollama error: {response.status_code}'}), 500
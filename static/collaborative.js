@@ -11,6 +11,9 @@ class CollaborativeApp {
         this.currentMode = 'conversation';
         this.isConnected = false;
         this.typingTimeout = null;
+        this.isTyping = false;
+        this.lastTypingSent = 0;
+        this.typingUsers = new Map(); // userId -> {threadId, nickname}
         this.otherThreads = new Map(); // threadId -> {user, messages, isGenerating}
         this.showOthers = false;
         
@@ -194,8 +197,8 @@ class CollaborativeApp {
                 this.addMessageToThread(message.thread_id, message.user_id, message.content, message.nickname, 'user');
                 break;
                 
-            case 'typing':
-                this.handleTypingIndicator(message.user_id, message.thread_id, message.is_typing, message.nickname);
+            case 'presence':
+                this.handlePresence(message.typing);
                 break;
                 
             case 'error':
@@ -216,6 +219,7 @@ class CollaborativeApp {
         // Clear input
         input.value = '';
         input.style.height = 'auto';
+        this.stopTyping();
         
         // Send to server
         this.websocket.send(JSON.stringify({
@@ -442,6 +446,28 @@ class CollaborativeApp {
         // This could be enhanced to show typing indicators in the others view
     }
     
+    handlePresence(typing) {
+        // Presence frames carry everyone typing now; diff against the last frame
+        const current = new Map();
+        for (const entry of typing) {
+            if (entry.user_id !== this.userId) {
+                current.set(entry.user_id, {threadId: entry.thread_id, nickname: entry.nickname});
+            }
+        }
+        
+        for (const [userId, info] of this.typingUsers) {
+            if (!current.has(userId)) {
+                this.handleTypingIndicator(userId, info.threadId, false, info.nickname);
+            }
+        }
+        for (const [userId, info] of current) {
+            if (!this.typingUsers.has(userId)) {
+                this.handleTypingIndicator(userId, info.threadId, true, info.nickname);
+            }
+        }
+        this.typingUsers = current;
+    }
+    
     handleTyping() {
         if (!this.isConnected) return;
         
@@ -450,21 +476,35 @@ class CollaborativeApp {
             clearTimeout(this.typingTimeout);
         }
         
-        // Send typing start
-        this.websocket.send(JSON.stringify({
-            type: 'typing',
-            thread_id: this.threadId,
-            is_typing: true
-        }));
-        
-        // Send typing stop after 1 second of inactivity
-        this.typingTimeout = setTimeout(() => {
+        // Send typing start once, refreshing before the server forgets it (5s)
+        const now = Date.now();
+        if (!this.isTyping || now - this.lastTypingSent > 3000) {
             this.websocket.send(JSON.stringify({
                 type: 'typing',
                 thread_id: this.threadId,
-                is_typing: false
+                is_typing: true
             }));
-        }, 1000);
+            this.isTyping = true;
+            this.lastTypingSent = now;
+        }
+        
+        // Send typing stop after 1 second of inactivity
+        this.typingTimeout = setTimeout(() => this.stopTyping(), 1000);
+    }
+    
+    stopTyping() {
+        if (this.typingTimeout) {
+            clearTimeout(this.typingTimeout);
+            this.typingTimeout = null;
+        }
+        if (!this.isTyping || !this.isConnected) return;
+        
+        this.isTyping = false;
+        this.websocket.send(JSON.stringify({
+            type: 'typing',
+            thread_id: this.threadId,
+            is_typing: false
+        }));
     }
     
     setMode(mode) {
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Gummy Static Pipeline - Minified, fingerprinted, precompressed static assets
+Run at startup by collaborative_app, or ahead of time with: python3 static_pipeline.py
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli  # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = "static"
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_NAME = "manifest.json"
+
+# Build order matters: images first so CSS/JS/HTML can point at their hashed names
+ASSETS = ["gummy-logo.svg", "send-arrow.svg", "collaborative.css", "collaborative.js"]
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def minify_css(text: str) -> str:
+    """Drop comments and collapse whitespace"""
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    return text.replace(";}", "}").strip()
+
+def minify_js(text: str) -> str:
+    """Strip indentation, blank lines and whole-line comments.
+
+    Line breaks are kept so automatic semicolon insertion still applies.
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+def minify_svg(text: str) -> str:
+    """Drop comments and whitespace between tags"""
+    text = re.sub(r"<!--.*?-->", "", text, flags=re.S)
+    return re.sub(r">\s+<", "><", text).strip()
+
+MINIFIERS = {".css": minify_css, ".js": minify_js, ".svg": minify_svg}
+
+def rewrite_urls(text: str, manifest: Dict[str, str], prefix: str = "/static/") -> str:
+    """Point /static/<name> references at their fingerprinted copies"""
+    for name, hashed in manifest.items():
+        text = text.replace(f"{prefix}{name}", f"{prefix}dist/{hashed}")
+    return text
+
+def _replace(path: str, data: bytes):
+    """Write via a temp file and rename, so a crashed or concurrent build never leaves a partial file"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _write(path: str, data: bytes):
+    if not os.path.exists(path):
+        _replace(path, data)
+
+def _prune(dist_dir: str, manifest: Dict[str, str]):
+    """Delete fingerprinted files the manifest no longer points at"""
+    keep = {MANIFEST_NAME}
+    for hashed in manifest.values():
+        keep.update((hashed, hashed + ".gz", hashed + ".br"))
+    for name in os.listdir(dist_dir):
+        # Temp files may be another worker's build in progress
+        if name not in keep and not name.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(dist_dir, name))
+            except FileNotFoundError:
+                pass  # Another worker's build got there first
+
+def build(static_dir: str = STATIC_DIR, dist_dir: str = DIST_DIR) -> Dict[str, str]:
+    """Minify, fingerprint and precompress assets; return name -> hashed name"""
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest: Dict[str, str] = {}
+
+    for name in ASSETS:
+        source = os.path.join(static_dir, name)
+        if not os.path.exists(source):
+            continue
+
+        stem, ext = os.path.splitext(name)
+        with open(source, "r", encoding="utf-8") as f:
+            text = rewrite_urls(f.read(), manifest)
+        data = MINIFIERS.get(ext, lambda t: t)(text).encode("utf-8")
+
+        hashed = f"{stem}.{hashlib.blake2b(data, digest_size=4).hexdigest()}{ext}"
+        target = os.path.join(dist_dir, hashed)
+        _write(target, data)
+        _write(target + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write(target + ".br", brotli.compress(data, quality=11))
+        manifest[name] = hashed
+
+    _replace(os.path.join(dist_dir, MANIFEST_NAME), json.dumps(manifest, indent=2).encode("utf-8"))
+    _prune(dist_dir, manifest)
+    return manifest
+
+def select_variant(dist_dir: str, filename: str, accept_encoding: str) -> Optional[Tuple[str, Optional[str]]]:
+    """Pick the best precompressed file for a request: (path, content-encoding)"""
+    path = os.path.join(dist_dir, os.path.basename(filename))
+    if not os.path.isfile(path):
+        return None
+
+    accepted = {token.split(";")[0].strip() for token in accept_encoding.lower().split(",")}
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if encoding in accepted and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+def media_type(filename: str) -> str:
+    """Content type of the uncompressed asset"""
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+if __name__ == "__main__":
+    for name, hashed in build().items():
+        print(f"{name} -> {DIST_DIR}/{hashed}")
+    if brotli is None:
+        print("brotli not installed; wrote gzip variants only")
@@ -0,0 +1,124 @@
+"""
+Gummy Structured Log - Leveled, sampled, queue-backed logging
+Records are queued on the calling thread and written by a listener thread, so the
+event loop never blocks on stdout; room/job context rides along with each record
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from typing import Dict
+
+# Configuration
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")  # "text" or "json"
+LOG_DEBUG_SAMPLE = float(os.environ.get("LOG_DEBUG_SAMPLE", "1.0"))  # Fraction of DEBUG records kept
+
+ROOT_LOGGER = "gummy"
+
+# Per-task context (room_id, job_id, user_id, ...); asyncio tasks inherit a copy
+_context: contextvars.ContextVar = contextvars.ContextVar("log_context", default={})
+
+# Attributes every LogRecord has; anything else came from extra= or bind()
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener = None
+
+def bind(**fields):
+    """Attach fields to every record logged from the current task or thread"""
+    _context.set({**_context.get(), **fields})
+
+def context() -> Dict[str, object]:
+    """Fields currently bound"""
+    return dict(_context.get())
+
+class ContextFilter(logging.Filter):
+    """Copy bound context onto records and sample DEBUG output"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and LOG_DEBUG_SAMPLE < 1.0 and random.random() >= LOG_DEBUG_SAMPLE:
+            return False
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+def _fields(record: logging.LogRecord) -> Dict[str, object]:
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_FIELDS and not k.startswith("_")}
+
+def _traceback(record: logging.LogRecord) -> str:
+    if record.exc_info and not record.exc_text:
+        record.exc_text = logging.Formatter().formatException(record.exc_info)
+    return record.exc_text or ""
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        entry.update(_fields(record))
+        if _traceback(record):
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable line with key=value context"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = (f"{time.strftime('%H:%M:%S', time.localtime(record.created))} "
+                f"{record.levelname:<7} {record.name}: {record.getMessage()}")
+        fields = _fields(record)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if _traceback(record):
+            line += "\n" + record.exc_text
+        return line
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue records with arguments merged; formatting happens on the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        _traceback(record)
+        record.exc_info = None  # Keep the rendered text, not the frames
+        return record
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT):
+    """Install the queue handler and start the writer thread once"""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    root.addHandler(handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the gummy namespace, set up on first use"""
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -0,0 +1,60 @@
+"""
+Gummy Summarizer - Rolling summarization of thread history
+Folds turns that fall out of the recent context window into a running summary
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+import aiohttp
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an AI assistant. "
+    "Merge the new turns into the existing summary. Keep names, facts, decisions, code "
+    "identifiers and open questions. Reply with the updated summary only, in under 200 words."
+)
+
+@dataclass
+class ThreadSummary:
+    text: str = ""
+    covered_until: float = 0.0  # Timestamp of the newest summarized message
+    turns_summarized: int = 0
+
+def cold_turns(history: List[dict], summary: ThreadSummary, window: int) -> List[dict]:
+    """Return turns outside the recent window that the summary doesn't cover yet"""
+    if len(history) <= window:
+        return []
+    return [m for m in history[:-window] if m.get("timestamp", 0) > summary.covered_until]
+
+def build_context(history: List[dict], summary: ThreadSummary, window: int) -> List[dict]:
+    """Build the prompt messages: running summary followed by the recent window"""
+    messages = history[-window:]
+    if summary.text:
+        return [{
+            "role": "system",
+            "content": f"Summary of the earlier conversation: {summary.text}"
+        }] + messages
+    return messages
+
+async def summarize(turns: List[dict], previous: str, model: str, base_url: str, timeout: float = 120) -> str:
+    """Ask Ollama to fold new turns into the previous summary"""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in turns)
+    prompt = f"Existing summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"
+
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"{base_url}/api/chat",
+            json={
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                "stream": False
+            },
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as resp:
+            if resp.status != 200:
+                raise RuntimeError(f"Ollama returned status {resp.status}")
+            data = await resp.json()
+            return data.get("message", {}).get("content", "").strip()
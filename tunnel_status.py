@@ -0,0 +1,64 @@
+"""
+Gummy Tunnel Status - Cached ngrok tunnel status
+A background thread polls the local ngrok agent; endpoints read the cached value instantly
+"""
+
+import os
+import threading
+import time
+
+import requests
+
+NGROK_API_URL = os.environ.get("NGROK_API_URL", "http://localhost:4040/api/tunnels")
+POLL_INTERVAL = 5.0  # Seconds between polls of the ngrok agent
+
+class TunnelStatus:
+    """Last known ngrok state, refreshed by a daemon thread"""
+
+    def __init__(self, url: str = NGROK_API_URL, interval: float = POLL_INTERVAL):
+        self.url = url
+        self.interval = interval
+        self.active = False
+        self.public_urls = []
+        self.checked_at = 0.0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start polling once"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll_loop, name="tunnel-status", daemon=True)
+                self._thread.start()
+
+    def _poll_loop(self):
+        while True:
+            self.poll()
+            time.sleep(self.interval)
+
+    def poll(self):
+        """Ask the ngrok agent for its tunnels"""
+        active, public_urls = False, []
+        try:
+            response = requests.get(self.url, timeout=1)
+            if response.status_code == 200:
+                tunnels = response.json().get('tunnels', [])
+                active = len(tunnels) > 0
+                public_urls = [t.get('public_url') for t in tunnels if t.get('public_url')]
+        except (requests.exceptions.RequestException, ValueError):
+            pass
+
+        self.active, self.public_urls = active, public_urls
+        self.checked_at = time.time()
+
+    def snapshot(self) -> dict:
+        """Cached status; starts the poller on first use"""
+        self.start()
+        return {
+            "ngrok_active": self.active,
+            "public_urls": self.public_urls,
+            "checked_at": self.checked_at
+        }
+
+# Shared by every app in the process
+tunnel = TunnelStatus()